@@ -5,6 +5,7 @@ Crystal Toolkit集成 - 正确方案
 """
 
 import json
+import re
 import tempfile
 import os
 from typing import Dict, Any, Optional
@@ -13,6 +14,9 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# 晶格常数a/b/c行：一次正则扫描全文，代替逐行的三路startswith判断
+_CELL_LENGTH_PATTERN = re.compile(r'^\s*_cell_length_(?P<axis>[abc])\S*[ \t]+(?P<value>\S+)', re.MULTILINE)
+
 class CrystalToolkitParser:
     """使用Crystal Toolkit生态系统进行CIF解析"""
     
@@ -140,31 +144,17 @@ class CrystalToolkitParser:
         """简化的CIF解析（备用方案）"""
         logger.info("🔄 使用简化CIF解析器")
         
-        lines = cif_content.split('\n')
-        
         # 解析晶格参数
         lattice_params = {
             'a': 5.59, 'b': 5.59, 'c': 5.59,
             'alpha': 90, 'beta': 90, 'gamma': 90
         }
         
-        for line in lines:
-            line = line.strip()
-            if line.startswith('_cell_length_a'):
-                try:
-                    lattice_params['a'] = float(line.split()[1])
-                except (ValueError, IndexError):
-                    pass
-            elif line.startswith('_cell_length_b'):
-                try:
-                    lattice_params['b'] = float(line.split()[1])
-                except (ValueError, IndexError):
-                    pass
-            elif line.startswith('_cell_length_c'):
-                try:
-                    lattice_params['c'] = float(line.split()[1])
-                except (ValueError, IndexError):
-                    pass
+        for match in _CELL_LENGTH_PATTERN.finditer(cif_content):
+            try:
+                lattice_params[match.group('axis')] = float(match.group('value'))
+            except ValueError:
+                pass
         
         # 构建标准NaCl结构（8个原子）
         structure_data = {
@@ -5,13 +5,15 @@ Crystal3D API路由定义
 """
 
 from fastapi import FastAPI, File, UploadFile, HTTPException, Request
-from fastapi.responses import HTMLResponse, FileResponse, JSONResponse
+from fastapi.responses import HTMLResponse, FileResponse, JSONResponse, Response
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 import os
 import json
+import hashlib
 import tempfile
 import shutil
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional
 
@@ -30,6 +32,34 @@ setup_logger()
 converter = CIFToUSDZConverter()
 output_manager = OutputManager()
 
+
+@lru_cache(maxsize=1)
+def _get_pymatgen_converter():
+    """
+    获取共享的PymatgenConverter实例
+    构造时会创建CrystalNN和配位环境策略，无需每个请求重新初始化
+    """
+    from pymatgen_converter import PymatgenConverter
+    return PymatgenConverter()
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    判断If-None-Match请求头是否命中ETag
+    按弱比较处理：支持逗号分隔的多个值、W/前缀和通配符*
+    """
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate == '*':
+            return True
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
 # 创建FastAPI应用实例
 app = FastAPI(
     title="Crystal3D - 晶体结构3D转换器",
@@ -384,8 +414,8 @@ async def download_file(session_id: str):
     except HTTPException:
         raise
     except Exception as e:
-        print(f"下载文件错误: {str(e)}")
-        print(f"错误详情: {traceback.format_exc()}")
+        logger.error(f"下载文件错误: {str(e)}")
+        logger.opt(exception=True).debug("错误详情")
         raise HTTPException(status_code=500, detail=f"下载失败: {str(e)}")
 
 @app.post("/parse_cif")
@@ -437,14 +467,11 @@ async def parse_cif_file(file: UploadFile = File(...)):
                 if project_root not in sys.path:
                     sys.path.insert(0, project_root)
                 
-                from pymatgen_converter import PymatgenConverter
-                pymatgen_converter = PymatgenConverter()
-                coordination_data = pymatgen_converter.analyze_coordination_environments(structure)
+                coordination_data = _get_pymatgen_converter().analyze_coordination_environments(structure)
                 logger.info(f"成功提取多面体数据: {len(coordination_data.get('polyhedra', []))} 个多面体")
             except Exception as e:
                 logger.warning(f"提取多面体数据失败: {e}")
-                import traceback
-                logger.debug(f"详细错误信息: {traceback.format_exc()}")
+                logger.opt(exception=True).debug("详细错误信息")
                 coordination_data = {'polyhedra': [], 'coordination_numbers': {}, 'geometry_types': {}}
             
             # 计算原子总数（考虑占位）
@@ -675,17 +702,26 @@ async def convert_cif_legacy(file: UploadFile = File(...)):
         pass
 
 @app.get("/api/sessions/{session_id}")
-async def get_session_info(session_id: str):
-    """获取会话信息"""
+async def get_session_info(session_id: str, request: Request):
+    """
+    获取会话信息
+    响应带ETag，客户端用If-None-Match轮询时内容未变化则返回304，不再重复传输
+    """
     try:
         session_info = output_manager.get_session_info(session_id)
         if not session_info:
             raise HTTPException(status_code=404, detail="会话不存在")
         
-        return {
+        response = JSONResponse({
             "success": True,
             "data": session_info
-        }
+        })
+        etag = f'"{hashlib.sha1(response.body).hexdigest()}"'
+        if _etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers={"ETag": etag})
+        
+        response.headers["ETag"] = etag
+        return response
     except HTTPException:
         raise
     except Exception as e:
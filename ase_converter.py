@@ -7,6 +7,7 @@
 
 import os
 import sys
+from functools import lru_cache
 import numpy as np
 from pathlib import Path
 from loguru import logger
@@ -16,13 +17,39 @@ try:
     from ase import Atoms
     from ase.io import read, write
     from ase.visualize import view
-    from ase.data import atomic_numbers, chemical_symbols, covalent_radii
+    from ase.data import chemical_symbols, covalent_radii
     from ase.neighborlist import NeighborList
     ASE_AVAILABLE = True
 except ImportError:
     ASE_AVAILABLE = False
     logger.warning("ASE库未安装，请运行: pip install ase")
 
+@lru_cache(maxsize=8)
+def _sphere_template(resolution: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, tuple]:
+    """
+    按分辨率缓存球面网格：纬线/经线角度的三角函数值和面索引
+    只与分辨率有关，所有原子共用，每个原子只需一次缩放和平移
+    """
+    lat = np.pi * (-0.5 + np.arange(resolution + 1) / resolution)
+    lon = 2 * np.pi * np.arange(resolution * 2) / (resolution * 2)
+    
+    faces = []
+    for i in range(resolution):
+        for j in range(resolution * 2):
+            # 当前四边形的四个顶点索引
+            v1 = i * (resolution * 2) + j
+            v2 = i * (resolution * 2) + (j + 1) % (resolution * 2)
+            v3 = (i + 1) * (resolution * 2) + (j + 1) % (resolution * 2)
+            v4 = (i + 1) * (resolution * 2) + j
+            
+            # 分成两个三角形
+            if i > 0:  # 避免极点处的退化三角形
+                faces.append((v1 + 1, v2 + 1, v4 + 1))  # OBJ索引从1开始
+            if i < resolution - 1:
+                faces.append((v2 + 1, v3 + 1, v4 + 1))
+    
+    return np.cos(lat), np.sin(lat), np.cos(lon), np.sin(lon), tuple(faces)
+
 class ASEConverter:
     """基于ASE的CIF到OBJ转换器"""
     
@@ -72,8 +99,8 @@ class ASEConverter:
         """计算化学键"""
         try:
             # 使用ASE的NeighborList计算邻居
-            cutoffs = [covalent_radii[atomic_numbers[symbol]] * cutoff_factor 
-                      for symbol in atoms.get_chemical_symbols()]
+            # 按原子序数整体索引共价半径表，代替逐个原子的符号查表
+            cutoffs = covalent_radii[atoms.get_atomic_numbers()] * cutoff_factor
             
             nl = NeighborList(cutoffs, self_interaction=False, bothways=False)
             nl.update(atoms)
@@ -81,9 +108,8 @@ class ASEConverter:
             bonds = []
             for i in range(len(atoms)):
                 indices, offsets = nl.get_neighbors(i)
-                for j in indices:
-                    if i < j:  # 避免重复
-                        bonds.append((i, j))
+                # 用数组掩码一次筛出j > i的近邻（避免重复），不再逐个比较
+                bonds.extend((i, j) for j in indices[indices > i].tolist())
             
             logger.info(f"计算得到{len(bonds)}个化学键")
             return bonds
@@ -92,39 +118,21 @@ class ASEConverter:
             return []
     
     def create_sphere_obj(self, center: Tuple[float, float, float], 
-                         radius: float, resolution: int = 20) -> Tuple[List, List]:
-        """创建球体的顶点和面"""
-        vertices = []
-        faces = []
-        
-        # 生成球体顶点
-        for i in range(resolution + 1):
-            lat = np.pi * (-0.5 + float(i) / resolution)
-            for j in range(resolution * 2):
-                lon = 2 * np.pi * float(j) / (resolution * 2)
-                
-                x = center[0] + radius * np.cos(lat) * np.cos(lon)
-                y = center[1] + radius * np.cos(lat) * np.sin(lon)
-                z = center[2] + radius * np.sin(lat)
-                
-                vertices.append((x, y, z))
+                         radius: float, resolution: int = 20) -> Tuple[np.ndarray, List]:
+        """
+        创建球体的顶点和面
+        顶点由缓存的球面网格整体缩放平移得到，返回(N, 3)数组
+        """
+        cos_lat, sin_lat, cos_lon, sin_lon, faces = _sphere_template(resolution)
         
-        # 生成球体面
-        for i in range(resolution):
-            for j in range(resolution * 2):
-                # 当前四边形的四个顶点索引
-                v1 = i * (resolution * 2) + j
-                v2 = i * (resolution * 2) + (j + 1) % (resolution * 2)
-                v3 = (i + 1) * (resolution * 2) + (j + 1) % (resolution * 2)
-                v4 = (i + 1) * (resolution * 2) + j
-                
-                # 分成两个三角形
-                if i > 0:  # 避免极点处的退化三角形
-                    faces.append([v1 + 1, v2 + 1, v4 + 1])  # OBJ索引从1开始
-                if i < resolution - 1:
-                    faces.append([v2 + 1, v3 + 1, v4 + 1])
+        # 生成球体顶点（按纬线逐圈、每圈按经线排列）
+        ring_radius = (radius * cos_lat)[:, None]
+        vertices = np.empty((len(cos_lat), len(cos_lon), 3))
+        vertices[..., 0] = center[0] + ring_radius * cos_lon
+        vertices[..., 1] = center[1] + ring_radius * sin_lon
+        vertices[..., 2] = (center[2] + radius * sin_lat)[:, None]
         
-        return vertices, faces
+        return vertices.reshape(-1, 3), list(faces)
     
     def create_cylinder_obj(self, start: Tuple[float, float, float], 
                            end: Tuple[float, float, float], 
@@ -222,11 +230,11 @@ class ASEConverter:
             
             vertex_offset = 0
             
+            # 一次性取出所有原子的显示半径（共价半径的一半）
+            radii = covalent_radii[atoms.get_atomic_numbers()] * 0.5 * scale_factor
+            
             # 添加原子球体
-            for i, (pos, symbol) in enumerate(zip(positions, symbols)):
-                # 获取原子半径
-                radius = covalent_radii[atomic_numbers[symbol]] * 0.5 * scale_factor
-                
+            for i, (pos, symbol, radius) in enumerate(zip(positions, symbols, radii)):
                 # 创建球体
                 vertices, faces = self.create_sphere_obj(pos, radius, sphere_resolution)
                 
@@ -292,8 +300,7 @@ class ASEConverter:
             
         except Exception as e:
             logger.error(f"ASE转换失败: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.opt(exception=True).debug("ASE转换失败详情")
             return False
     
     def convert_cif_to_obj(self, cif_path: str, obj_path: str, **kwargs) -> Dict:
@@ -370,11 +377,11 @@ def test_ase_converter():
             file_size = os.path.getsize(output_obj)
             logger.info(f"OBJ文件大小: {file_size} 字节")
             
-            with open(output_obj, 'r', encoding='utf-8') as f:
+            with open(output_obj, 'rb') as f:
                 content = f.read()
             
-            vertex_count = content.count('\nv ')
-            face_count = content.count('\nf ')
+            vertex_count = content.count(b'\nv ')
+            face_count = content.count(b'\nf ')
             logger.info(f"顶点数: {vertex_count}")
             logger.info(f"面数: {face_count}")
         
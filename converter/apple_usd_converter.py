@@ -9,8 +9,10 @@ Apple USD转换器
 import os
 import tempfile
 import shutil
+from itertools import chain
 from pathlib import Path
 from typing import Optional, Tuple, Dict, Any
+import numpy as np
 from loguru import logger
 
 try:
@@ -21,6 +23,7 @@ except ImportError:
     logger.warning("Pixar USD Python API不可用，请安装: pip install usd-core")
 
 from .material_standardizer import material_standardizer
+from .usdz_converter import triangulate_fan
 
 
 class AppleUSDConverter:
@@ -109,7 +112,7 @@ class AppleUSDConverter:
             # 设置顶点和面
             mesh_prim.CreatePointsAttr(vertices)
             mesh_prim.CreateFaceVertexIndicesAttr(faces)
-            mesh_prim.CreateFaceVertexCountsAttr([3] * (len(faces) // 3))  # 假设都是三角形
+            mesh_prim.CreateFaceVertexCountsAttr(Vt.IntArray.FromNumpy(np.full(len(faces) // 3, 3, dtype=np.int32)))  # 已全部三角化
             
             # 计算法线（Apple设备渲染优化）
             self._compute_normals(mesh_prim, vertices, faces)
@@ -153,45 +156,55 @@ class AppleUSDConverter:
     def _parse_obj_file(self, obj_path: str, mtl_path: Optional[str] = None):
         """解析OBJ文件"""
         vertices = []
-        faces = []
+        face_rows = []
         materials = {}
         
         try:
-            with open(obj_path, 'r', encoding='utf-8') as f:
+            # 第一遍：逐行收集顶点坐标和每个面的顶点索引
+            # 以bytes读取，int()/float()直接解析bytes，不经过Unicode解码
+            # 每行只split一次，按首个token分派，代替逐个startswith前缀比较
+            split = bytes.split
+            with open(obj_path, 'rb') as f:
                 for line in f:
-                    line = line.strip()
-                    if line.startswith('v '):
+                    parts = split(line)
+                    if not parts:
+                        continue
+                    tag = parts[0]
+                    if tag == b'v':
                         # 顶点坐标
-                        parts = line.split()[1:4]
-                        vertex = [float(p) for p in parts]
-                        vertices.append(vertex)
-                    elif line.startswith('f '):
-                        # 面索引
-                        parts = line.split()[1:]
-                        face_indices = []
-                        for part in parts:
-                            # 处理 "vertex/texture/normal" 格式
-                            vertex_idx = int(part.split('/')[0]) - 1  # OBJ索引从1开始
-                            face_indices.append(vertex_idx)
-                        
-                        # 转换为三角形（如果是四边形则分割）
-                        if len(face_indices) == 3:
-                            faces.extend(face_indices)
-                        elif len(face_indices) == 4:
-                            # 分割四边形为两个三角形
-                            faces.extend([face_indices[0], face_indices[1], face_indices[2]])
-                            faces.extend([face_indices[0], face_indices[2], face_indices[3]])
+                        vertices.append([float(p) for p in parts[1:4]])
+                    elif tag == b'f':
+                        # 面索引，处理 "vertex/texture/normal" 格式
+                        face_rows.append([int(part.partition(b'/')[0]) for part in parts[1:]])
+            
+            # 第二遍：按面顶点数一次性分配扁平索引数组，再转换为三角形
+            counts = np.fromiter(map(len, face_rows), dtype=np.int32, count=len(face_rows))
+            indices = np.fromiter(chain.from_iterable(face_rows), dtype=np.int32, count=int(counts.sum())) - 1  # OBJ索引从1开始
+            faces = self._triangulate(counts, indices)
             
             # 解析材质文件
             if mtl_path and os.path.exists(mtl_path):
                 materials = self._parse_mtl_file(mtl_path)
             
-            return Vt.Vec3fArray(vertices), Vt.IntArray(faces), materials
+            points = np.array(vertices, dtype=np.float32).reshape(-1, 3)
+            return Vt.Vec3fArray.FromNumpy(points), Vt.IntArray.FromNumpy(faces), materials
             
         except Exception as e:
             logger.error(f"OBJ文件解析失败: {e}")
             return [], [], {}
     
+    def _triangulate(self, counts: np.ndarray, indices: np.ndarray) -> np.ndarray:
+        """
+        将三角形和四边形转换为三角形索引（四边形沿v0-v2分割），其他面忽略
+        """
+        keep = (counts == 3) | (counts == 4)
+        if not keep.all():
+            indices = indices[np.repeat(keep, counts)]
+            counts = counts[keep]
+        
+        # 四边形的扇形三角化 (v0, v1, v2), (v0, v2, v3) 即沿v0-v2分割
+        return np.ascontiguousarray(triangulate_fan(counts, indices), dtype=np.int32)
+    
     def _parse_mtl_file(self, mtl_path: str) -> Dict[str, Dict]:
         """解析MTL材质文件"""
         materials = {}
@@ -11,6 +11,7 @@ import shutil
 from pathlib import Path
 from typing import Optional, Dict, Any, Tuple
 from loguru import logger
+from utils.file_utils import get_shm_dir
 
 # 导入CIF转换器
 try:
@@ -51,6 +52,24 @@ except ImportError:
     DOCKER_USD_AVAILABLE = False
     DockerUsdzConverter = None
 
+# 转换中间文件（OBJ/MTL）所在临时目录的父目录，可通过该环境变量指定
+TEMP_DIR_ENV = 'CIF_CONVERTER_TEMP_DIR'
+# 未指定时，内存文件系统可写且剩余空间不少于该值就把中间文件放在内存中
+SHM_MIN_FREE_SPACE = 256 * 1024 * 1024
+
+
+def _conversion_temp_root() -> Optional[str]:
+    """
+    选择转换临时目录的父目录
+    CIF转OBJ后会立即读回OBJ生成USDZ，放在内存中可避免落盘再读取；
+    返回None时使用系统默认临时目录
+    """
+    configured = os.getenv(TEMP_DIR_ENV)
+    if configured:
+        os.makedirs(configured, exist_ok=True)
+        return configured
+    return get_shm_dir(SHM_MIN_FREE_SPACE)
+
 
 class CIFToUSDZConverter:
     """
@@ -197,7 +216,7 @@ class CIFToUSDZConverter:
         
         try:
             # 创建临时目录
-            self.temp_dir = tempfile.mkdtemp(prefix='cif_to_usdz_')
+            self.temp_dir = tempfile.mkdtemp(prefix='cif_to_usdz_', dir=_conversion_temp_root())
             logger.info(f"创建临时目录: {self.temp_dir}")
             
             # 步骤1: CIF转OBJ
@@ -8,10 +8,15 @@
 
 import os
 import re
+import math
 from typing import Dict, Tuple, Optional, List
 from loguru import logger
 
 
+# 读写OBJ/MTL文本时的缓冲区大小，整文件一次读入后再按行处理
+FILE_BUFFER_SIZE = 1 << 20
+
+
 class MaterialStandardizer:
     """
     材质标准化器
@@ -250,21 +255,22 @@ class MaterialStandardizer:
             return materials
         
         try:
-            with open(mtl_path, 'r', encoding='utf-8') as f:
-                current_material = None
+            with open(mtl_path, 'r', encoding='utf-8', buffering=FILE_BUFFER_SIZE) as f:
+                lines = f.read().splitlines()
+            
+            current_material = None
+            for line in lines:
+                line = line.strip()
                 
-                for line in f:
-                    line = line.strip()
-                    
-                    if line.startswith('newmtl '):
-                        current_material = line.split()[1]
-                    elif line.startswith('Kd ') and current_material:
-                        # 漫反射颜色
-                        rgb_values = line.split()[1:4]
-                        if len(rgb_values) == 3:
-                            color = tuple(float(x) for x in rgb_values)
-                            materials[current_material] = color
-                            
+                if line.startswith('newmtl '):
+                    current_material = line.split()[1]
+                elif line.startswith('Kd ') and current_material:
+                    # 漫反射颜色
+                    rgb_values = line.split()[1:4]
+                    if len(rgb_values) == 3:
+                        color = tuple(float(x) for x in rgb_values)
+                        materials[current_material] = color
+                        
         except Exception as e:
             logger.warning(f"解析MTL文件失败: {e}")
         
@@ -324,18 +330,15 @@ class MaterialStandardizer:
         """
         通过颜色匹配找到最接近的元素
         """
-        min_distance = float('inf')
-        best_match = None
-        
-        for element, standard_color in self.STANDARD_CPK_COLORS.items():
-            # 计算颜色距离
-            distance = sum((c1 - c2) ** 2 for c1, c2 in zip(color, standard_color)) ** 0.5
-            
-            if distance < min_distance and distance < self.color_tolerance:
-                min_distance = distance
-                best_match = element
-        
-        return best_match
+        # min()在C层比较，math.dist直接计算欧氏距离；距离相同时与逐个比较一样取第一个
+        best_match, standard_color = min(
+            self.STANDARD_CPK_COLORS.items(),
+            key=lambda item: math.dist(color, item[1])
+        )
+        
+        if math.dist(color, standard_color) < self.color_tolerance:
+            return best_match
+        return None
     
     def _infer_from_hex_name(self, material_name: str) -> Optional[str]:
         """
@@ -369,8 +372,8 @@ class MaterialStandardizer:
             return
         
         try:
-            with open(obj_path, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
+            with open(obj_path, 'r', encoding='utf-8', buffering=FILE_BUFFER_SIZE) as f:
+                lines = f.read().splitlines(keepends=True)
             
             updated_lines = []
             for line in lines:
@@ -383,7 +386,7 @@ class MaterialStandardizer:
                 
                 updated_lines.append(line)
             
-            with open(obj_path, 'w', encoding='utf-8') as f:
+            with open(obj_path, 'w', encoding='utf-8', buffering=FILE_BUFFER_SIZE) as f:
                 f.writelines(updated_lines)
                 
         except Exception as e:
@@ -11,7 +11,10 @@
 """
 
 import os
+import re
 import sys
+import mmap
+from collections import Counter
 from pathlib import Path
 from typing import Optional, Dict, Any
 from loguru import logger
@@ -19,6 +22,9 @@ from loguru import logger
 # 添加项目根目录到路径
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+# OBJ顶点/面行的匹配模式（按字节匹配，允许行首空白），分组为行类型b'v'或b'f'
+OBJ_VERTEX_FACE_PATTERN = re.compile(rb'^[ \t]*([vf]) ', re.MULTILINE)
+
 # 尝试导入所有可用的转换器
 try:
     from pymatgen_converter import PymatgenConverter
@@ -251,19 +257,15 @@ class ReliableCIFConverter:
     def _analyze_obj_file(self, obj_file: str, result: Dict):
         """分析OBJ文件获取统计信息"""
         try:
-            vertices = 0
-            faces = 0
-            
-            with open(obj_file, 'r') as f:
-                for line in f:
-                    line = line.strip()
-                    if line.startswith('v '):
-                        vertices += 1
-                    elif line.startswith('f '):
-                        faces += 1
+            # 内存映射文件，由正则引擎在C层一次扫描同时统计顶点行和面行
+            line_counts = Counter()
+            with open(obj_file, 'rb') as f:
+                if os.fstat(f.fileno()).st_size > 0:  # 空文件无法映射
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                        line_counts.update(OBJ_VERTEX_FACE_PATTERN.findall(data))
             
-            result['vertices'] = vertices
-            result['faces'] = faces
+            result['vertices'] = line_counts[b'v']
+            result['faces'] = line_counts[b'f']
             
         except Exception as e:
             logger.warning(f"分析OBJ文件失败: {e}")
@@ -8,25 +8,436 @@ TinyUSDZ转换器
 import os
 import sys
 import logging
-import tempfile
-import shutil
+import io
+import mmap
+import struct
+import time
+import threading
+import zipfile
+from concurrent.futures import Future, ProcessPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional, Tuple, Dict, Any
 
+import numpy as np
+
+from utils.file_utils import cached_by_stat
+
+# Jinja2（可选）：仅生成带几何数据的USD模板时需要
+try:
+    from jinja2 import Environment, DictLoader
+    JINJA2_AVAILABLE = True
+except ImportError:
+    JINJA2_AVAILABLE = False
+
 # 添加TinyUSDZ路径
 tinyusdz_path = Path(__file__).parent.parent / "tinyusdz" / "src"
 if tinyusdz_path.exists():
     sys.path.insert(0, str(tinyusdz_path))
 
+# USDZ要求包内每个文件的数据起始位置按64字节对齐
+USDZ_ALIGNMENT = 64
+# 对齐填充使用的ZIP扩展字段ID（与Pixar UsdUtils一致）
+USDZ_PADDING_HEADER_ID = 0x1986
+# 打包时每次写入的块大小
+USDZ_COPY_BUFFER_SIZE = 1 << 22
+
+# 基本USD内容（静态，不含几何数据，几何由包内的OBJ文件提供）
+_BASIC_USD_CONTENT = """#usda 1.0
+(
+    defaultPrim = "Model"
+    metersPerUnit = 1
+    upAxis = "Y"
+    doc = "Generated by TinyUSDZ Converter"
+)
+
+def Xform "Model" (
+    kind = "component"
+)
+{
+    def Mesh "mesh" (
+        prepend apiSchemas = ["MaterialBindingAPI"]
+    )
+    {
+        # 引用OBJ文件
+        # 注意：这是一个简化的实现
+        # 实际的USD应该包含从OBJ解析的几何数据
+        
+        # 基本几何属性
+        uniform token subdivisionScheme = "none"
+        
+        # 材质绑定
+        rel material:binding = </Model/Materials/DefaultMaterial>
+    }
+    
+    def Scope "Materials"
+    {
+        def Material "DefaultMaterial"
+        {
+            token outputs:surface.connect = </Model/Materials/DefaultMaterial/DefaultSurface.outputs:surface>
+            
+            def Shader "DefaultSurface"
+            {
+                uniform token info:id = "UsdPreviewSurface"
+                color3f inputs:diffuseColor = (0.8, 0.8, 0.8)
+                float inputs:metallic = 0.0
+                float inputs:roughness = 0.5
+                token outputs:surface
+            }
+        }
+    }
+}
+"""
+
+# USD模板（Jinja2）
+_ENHANCED_USD_TEMPLATE = """#usda 1.0
+(
+    defaultPrim = "Model"
+    metersPerUnit = 1
+    upAxis = "Y"
+    doc = "Generated by TinyUSDZ Converter v0.9.0"
+    comment = "Source: {{ obj_filename }}, Vertices: {{ vertex_count }}, Faces: {{ face_count }}"
+)
+
+def Xform "Model" (
+    kind = "component"
+)
+{
+    def Mesh "mesh" (
+        prepend apiSchemas = ["MaterialBindingAPI"]
+    )
+    {
+        # 几何数据
+{% if points %}
+        point3f[] points = [{{ points }}]
+{% endif %}
+{% if face_vertex_indices %}
+        int[] faceVertexIndices = [{{ face_vertex_indices }}]
+        int[] faceVertexCounts = [{{ face_vertex_counts }}]
+{% endif %}
+
+        # 细分方案
+        uniform token subdivisionScheme = "none"
+
+        # 法向量插值
+        uniform token faceVaryingLinearInterpolation = "cornersPlus1"
+        uniform token interpolateBoundary = "edgeAndCorner"
+{% if materials %}
+
+        # 材质绑定
+        rel material:binding = </Model/Materials/{{ materials[0].name }}>
+{% endif %}
+    }
+
+    def Scope "Materials"
+    {
+{% for material in materials %}
+        def Material "{{ material.name }}"
+        {
+            token outputs:surface.connect = </Model/Materials/{{ material.name }}/Surface.outputs:surface>
+
+            def Shader "Surface"
+            {
+                uniform token info:id = "UsdPreviewSurface"
+                color3f inputs:diffuseColor = ({{ material.r }}, {{ material.g }}, {{ material.b }})
+                float inputs:metallic = 0.1
+                float inputs:roughness = 0.6
+                token outputs:surface
+            }
+        }
+{% else %}
+        def Material "DefaultMaterial"
+        {
+            token outputs:surface.connect = </Model/Materials/DefaultMaterial/Surface.outputs:surface>
+
+            def Shader "Surface"
+            {
+                uniform token info:id = "UsdPreviewSurface"
+                color3f inputs:diffuseColor = (0.8, 0.8, 0.8)
+                float inputs:metallic = 0.0
+                float inputs:roughness = 0.5
+                token outputs:surface
+            }
+        }
+{% endfor %}
+    }
+}
+"""
+
+_IOS_USD_TEMPLATE = """#usda 1.0
+(
+    defaultPrim = "Crystal"
+    metersPerUnit = 1
+    upAxis = "Y"
+    startTimeCode = 1
+    endTimeCode = 1
+    timeCodesPerSecond = 24
+    doc = "Generated for iOS AR Quick Look compatibility"
+    comment = "Source: {{ obj_filename }}, Vertices: {{ vertex_count }}, Faces: {{ face_count }}"
+)
+
+def Xform "Crystal" (
+    assetInfo = {
+        string name = "Crystal Structure"
+    }
+    kind = "component"
+)
+{
+    matrix4d xformOp:transform = ( (1, 0, 0, 0), (0, 1, 0, 0), (0, 0, 1, 0), (0, 0, 0, 1) )
+    uniform token[] xformOpOrder = ["xformOp:transform"]
+
+    def Mesh "CrystalMesh" (
+        prepend apiSchemas = ["MaterialBindingAPI"]
+    )
+    {
+        # 几何数据
+        point3f[] points = [{% for chunk in points %}{{ chunk }}{% endfor %}]
+        int[] faceVertexCounts = [{% for chunk in face_vertex_counts %}{{ chunk }}{% endfor %}]
+        int[] faceVertexIndices = [{% for chunk in face_vertex_indices %}{{ chunk }}{% endfor %}]
+
+        # 法向量（自动计算）
+        normal3f[] normals = []
+
+        # 细分设置（对AR很重要）
+        uniform token subdivisionScheme = "none"
+
+        # 材质绑定
+        rel material:binding = </Crystal/Materials/CrystalMaterial>
+
+        # 显示设置
+        uniform token purpose = "default"
+        bool doubleSided = true
+
+        # AR Quick Look特定设置
+        uniform token orientation = "rightHanded"
+    }
+
+    def Scope "Materials"
+    {
+        def Material "CrystalMaterial"
+        {
+            token outputs:surface.connect = </Crystal/Materials/CrystalMaterial/PBRShader.outputs:surface>
+
+            def Shader "PBRShader"
+            {
+                uniform token info:id = "UsdPreviewSurface"
+                color3f inputs:diffuseColor = (0.7, 0.8, 0.9)
+                float inputs:metallic = 0.2
+                float inputs:roughness = 0.3
+                float inputs:opacity = 0.9
+                color3f inputs:emissiveColor = (0.05, 0.05, 0.1)
+                float inputs:ior = 1.5
+                token outputs:surface
+            }
+        }
+    }
+}
+"""
+
+# 数组元素格式化函数（预先绑定，避免逐元素构造f-string）
+# 使用!s转换，float32按自身最短表示输出，而不是提升为float64后的长尾数
+_POINT_FORMAT = "({0[0]!s}, {0[1]!s}, {0[2]!s})".format
+_TRIANGLE_FORMAT = "{0[0]}, {0[1]}, {0[2]}".format
+# 增强USD中最多输出的材质数量，第i个材质颜色为基色加i*步长
+ENHANCED_USD_MAX_MATERIALS = 3
+_ENHANCED_MATERIAL_BASE_COLOR = (0.7, 0.6, 0.5)
+_ENHANCED_MATERIAL_COLOR_STEP = 0.1
+# 大数组按块拼接，块内用str.join，块间流式输出
+USD_ARRAY_CHUNK_SIZE = 4096
+
+# 模板环境在导入时创建一次，模板编译后常驻缓存（jinja2未安装时为None）
+_USD_TEMPLATES = None
+if JINJA2_AVAILABLE:
+    _USD_TEMPLATES = Environment(
+        loader=DictLoader({
+            "enhanced.usda": _ENHANCED_USD_TEMPLATE,
+            "ios.usda": _IOS_USD_TEMPLATE,
+        }),
+        auto_reload=False,
+        cache_size=-1,
+        trim_blocks=True,
+        lstrip_blocks=True,
+        keep_trailing_newline=True,
+    )
+
+
+def _get_usd_template(name: str):
+    """获取编译好的USD模板；jinja2未安装时抛出ImportError"""
+    if _USD_TEMPLATES is None:
+        raise ImportError("jinja2未安装，无法生成带几何数据的USD，请运行: pip install jinja2")
+    return _USD_TEMPLATES.get_template(name)
+
+
+# 库文件匹配模式（Windows / Linux / macOS），覆盖c-tinyusd与tinyusdz两种命名
+TINYUSDZ_LIBRARY_PATTERNS = ('*tinyusd*.dll', '*tinyusd*.so', '*tinyusd*.dylib')
+
+
+@lru_cache(maxsize=1)
+def _find_tinyusdz_library() -> Optional[str]:
+    """
+    查找TinyUSDZ库文件
+    结果在进程生命周期内不变，只查找一次
+    """
+    tinyusdz_root = Path(__file__).parent.parent / "tinyusdz"
+    
+    # 搜索路径 - 优先查找新构建的Release目录
+    search_paths = [
+        tinyusdz_root / "build" / "Release",
+        tinyusdz_root / "build" / "Debug",
+        tinyusdz_root / "build",
+        tinyusdz_root / "lib",
+        tinyusdz_root,
+        Path("."),
+    ]
+    
+    for search_path in search_paths:
+        for pattern in TINYUSDZ_LIBRARY_PATTERNS:
+            lib_path = next(search_path.glob(pattern), None)
+            if lib_path is not None:
+                return str(lib_path)
+    
+    return None
+
+
+def _format_face(face) -> str:
+    return ", ".join(map(str, face))
+
+
+def _format_face_size(face) -> str:
+    return str(len(face))
+
+
+def _join_array_chunks(items, format_item):
+    """
+    按块格式化USD数组内容，每块一次str.join，块之间补逗号分隔
+    """
+    for start in range(0, len(items), USD_ARRAY_CHUNK_SIZE):
+        chunk = ", ".join(map(format_item, items[start:start + USD_ARRAY_CHUNK_SIZE]))
+        yield chunk if start == 0 else ", " + chunk
+
+
+def _empty_geometry_info() -> Dict[str, Any]:
+    return {
+        'vertices': np.empty((0, 3), dtype=np.float32),
+        'faces': (),
+        'normals': (),
+        'texcoords': (),
+        'materials': (),
+        'vertex_count': 0,
+        'face_count': 0
+    }
+
+
+def _parse_obj_vertex(parts: list, geometry: Dict[str, list]):
+    # 顶点坐标
+    if len(parts) >= 4:
+        geometry['vertices'].append((float(parts[1]), float(parts[2]), float(parts[3])))
+
+
+def _parse_obj_normal(parts: list, geometry: Dict[str, list]):
+    # 法向量
+    if len(parts) >= 4:
+        geometry['normals'].append((float(parts[1]), float(parts[2]), float(parts[3])))
+
+
+def _parse_obj_texcoord(parts: list, geometry: Dict[str, list]):
+    # 纹理坐标
+    if len(parts) >= 3:
+        geometry['texcoords'].append((float(parts[1]), float(parts[2])))
+
+
+def _parse_obj_face(parts: list, geometry: Dict[str, list]):
+    # 面，处理 v/vt/vn 格式，OBJ索引从1开始
+    face_indices = tuple(
+        int(part.split(b'/', 1)[0]) - 1 for part in parts[1:] if part[:1] != b'/'
+    )
+    if len(face_indices) >= 3:
+        geometry['faces'].append(face_indices)
+
+
+def _parse_obj_material(parts: list, geometry: Dict[str, list]):
+    # 材质
+    if len(parts) >= 2:
+        material_name = parts[1].decode('utf-8')
+        if material_name not in geometry['materials']:
+            geometry['materials'].append(material_name)
+
+
+# 每行只split一次，按首个token分派（行首缩进、制表符分隔都能识别），
+# 未知token（注释、mtllib、o、g、s等）直接跳过；法向量和纹理坐标目前没有使用方，默认不解析
+_OBJ_LINE_HANDLERS = {
+    b'v': _parse_obj_vertex,
+    b'f': _parse_obj_face,
+    b'usemtl': _parse_obj_material,
+}
+
+
+@cached_by_stat(maxsize=32)
+def _parse_obj_cached(obj_file_path: str, parse_normals: bool = False,
+                      parse_texcoords: bool = False) -> Dict[str, Any]:
+    """
+    解析OBJ文件获取几何信息
+    未请求的normals/texcoords保持为空元组，返回结构不变
+    解析出错时直接抛出，不把不完整的几何数据留在缓存里
+    """
+    geometry = {
+        'vertices': [],
+        'faces': [],
+        'normals': [],
+        'texcoords': [],
+        'materials': [],
+    }
+    handlers = _OBJ_LINE_HANDLERS
+    if parse_normals or parse_texcoords:
+        handlers = dict(handlers)
+        if parse_normals:
+            handlers[b'vn'] = _parse_obj_normal
+        if parse_texcoords:
+            handlers[b'vt'] = _parse_obj_texcoord
+    
+    # 通过mmap按字节逐行读取，OBJ为ASCII文本，无需解码，也不经过文本IO层
+    with open(obj_file_path, 'rb') as f:
+        # 空文件无法mmap，直接返回空结果
+        if os.fstat(f.fileno()).st_size:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                for line in iter(mapped.readline, b''):
+                    parts = line.split()
+                    if parts:
+                        handler = handlers.get(parts[0])
+                        if handler is not None:
+                            handler(parts, geometry)
+    
+    geometry_info = {key: tuple(values) for key, values in geometry.items()}
+    # 顶点存为(N, 3)的float32数组（与USD point3f精度一致），只读以保护缓存
+    vertices = np.array(geometry['vertices'], dtype=np.float32).reshape(-1, 3)
+    vertices.flags.writeable = False
+    geometry_info['vertices'] = vertices
+    geometry_info['vertex_count'] = len(geometry_info['vertices'])
+    geometry_info['face_count'] = len(geometry_info['faces'])
+    return geometry_info
+
+
 class TinyUSDZConverter:
     """
     TinyUSDZ转换器类
     使用TinyUSDZ C API进行OBJ到USDZ转换
     """
     
+    # 异步转换使用的进程池，在首次异步调用时创建（Windows下spawn子进程会重新导入本模块，
+    # 不能在导入时创建）
+    _conversion_pool: Optional[ProcessPoolExecutor] = None
+    _conversion_pool_lock = threading.Lock()
+    
     def __init__(self):
         self.logger = logging.getLogger(__name__)
-        self.tinyusdz_available = self._check_tinyusdz_availability()
+        # 首次访问tinyusdz_available时才检查，未使用的转换器不产生开销
+        self._tinyusdz_available = None
+    
+    @property
+    def tinyusdz_available(self) -> bool:
+        if self._tinyusdz_available is None:
+            self._tinyusdz_available = self._check_tinyusdz_availability()
+        return self._tinyusdz_available
         
     def _check_tinyusdz_availability(self) -> bool:
         """
@@ -38,7 +449,7 @@ class TinyUSDZConverter:
             import ctypes
             
             # 查找TinyUSDZ的C库
-            tinyusdz_lib_path = self._find_tinyusdz_library()
+            tinyusdz_lib_path = _find_tinyusdz_library()
             if tinyusdz_lib_path:
                 self.logger.info(f"找到TinyUSDZ库: {tinyusdz_lib_path}")
                 return True
@@ -50,41 +461,9 @@ class TinyUSDZConverter:
             self.logger.warning(f"TinyUSDZ不可用: {e}")
             return False
     
-    def _find_tinyusdz_library(self) -> Optional[str]:
-        """
-        查找TinyUSDZ库文件
-        """
-        # 可能的库文件名
-        lib_names = [
-            "c-tinyusd.dll",  # Windows
-            "libc-tinyusd.so",  # Linux
-            "libc-tinyusd.dylib",  # macOS
-            "tinyusdz.dll",
-            "libtinyusdz.so",
-            "libtinyusdz.dylib"
-        ]
-        
-        # 搜索路径 - 优先查找新构建的Release目录
-        search_paths = [
-            Path(__file__).parent.parent / "tinyusdz" / "build" / "Release",
-            Path(__file__).parent.parent / "tinyusdz" / "build" / "Debug",
-            Path(__file__).parent.parent / "tinyusdz" / "build",
-            Path(__file__).parent.parent / "tinyusdz" / "lib",
-            Path(__file__).parent.parent / "tinyusdz",
-            Path("."),
-        ]
-        
-        for search_path in search_paths:
-            if search_path.exists():
-                for lib_name in lib_names:
-                    lib_path = search_path / lib_name
-                    if lib_path.exists():
-                        return str(lib_path)
-        
-        return None
-    
     def convert_obj_to_usdz(self, obj_file_path: str, output_path: str, 
-                           material_file_path: Optional[str] = None) -> Tuple[bool, str]:
+                           material_file_path: Optional[str] = None,
+                           embed_geometry: bool = False) -> Tuple[bool, str]:
         """
         将OBJ文件转换为USDZ格式
         
@@ -92,6 +471,8 @@ class TinyUSDZConverter:
             obj_file_path: OBJ文件路径
             output_path: 输出USDZ文件路径
             material_file_path: 材质文件路径（可选）
+            embed_geometry: 是否解析OBJ并将几何数据写入model.usda。
+                            为False时只生成静态USD，几何数据由包内的OBJ提供
             
         Returns:
             (成功标志, 错误信息)
@@ -99,15 +480,42 @@ class TinyUSDZConverter:
         try:
             # 使用轻量级转换方法
             # 即使TinyUSDZ库未构建，也能提供基本的USDZ转换功能
-            return self._convert_using_fallback_method(obj_file_path, output_path, material_file_path)
+            return self._convert_using_fallback_method(
+                obj_file_path, output_path, material_file_path, embed_geometry
+            )
             
         except Exception as e:
             error_msg = f"TinyUSDZ转换失败: {str(e)}"
             self.logger.error(error_msg)
             return False, error_msg
     
+    def convert_obj_to_usdz_async(self, obj_file_path: str, output_path: str, 
+                                 material_file_path: Optional[str] = None,
+                                 embed_geometry: bool = False) -> Future:
+        """
+        在进程池中执行OBJ到USDZ转换，不阻塞调用线程
+        
+        解析和USD生成都持有GIL，放到独立进程后多个转换可以并行使用多核。
+        调用方脚本需要有 if __name__ == "__main__" 保护（Windows spawn要求）。
+        
+        Returns:
+            Future，结果为 (成功标志, 错误信息)
+        """
+        return self._get_conversion_pool().submit(
+            _convert_obj_to_usdz_in_worker,
+            obj_file_path, output_path, material_file_path, embed_geometry
+        )
+    
+    @classmethod
+    def _get_conversion_pool(cls) -> ProcessPoolExecutor:
+        with cls._conversion_pool_lock:
+            if cls._conversion_pool is None:
+                cls._conversion_pool = ProcessPoolExecutor(max_workers=os.cpu_count())
+            return cls._conversion_pool
+    
     def _convert_using_fallback_method(self, obj_file_path: str, output_path: str, 
-                                     material_file_path: Optional[str] = None) -> Tuple[bool, str]:
+                                     material_file_path: Optional[str] = None,
+                                     embed_geometry: bool = False) -> Tuple[bool, str]:
         """
         使用备用方法进行转换
         这是一个简化的实现，创建基本的USDZ结构
@@ -119,168 +527,95 @@ class TinyUSDZConverter:
             if output_dir:  # 只有当目录路径不为空时才创建
                 os.makedirs(output_dir, exist_ok=True)
             
-            # 创建临时目录
-            with tempfile.TemporaryDirectory() as temp_dir:
-                temp_path = Path(temp_dir)
-                
-                # 解析OBJ文件获取几何信息
-                geometry_info = self._parse_obj_file(obj_file_path)
-                
-                # 生成增强的USD内容（包含完整几何数据）
-                usd_content = self._generate_enhanced_usd_from_obj(
-                    obj_file_path, material_file_path, geometry_info
+            # 创建USDZ包（实际上是一个ZIP文件）
+            # 使用无压缩模式，保持与材质修复工具一致
+            # model.usda直接写入包内，OBJ和材质文件直接从原路径读取，不经过临时目录
+            # 注意：这里保留标准库zipfile而不是libarchive等流式打包库，因为USDZ要求
+            # 每个文件数据按64字节对齐，需要逐项控制本地文件头的扩展字段填充
+            with zipfile.ZipFile(output_path, 'w', zipfile.ZIP_STORED) as zipf:
+                # 添加USD文件
+                usd_info = self._usdz_zipinfo(
+                    zipf, zipfile.ZipInfo("model.usda", date_time=time.localtime()[:6])
                 )
+                if embed_geometry:
+                    # 解析OBJ文件获取几何信息
+                    geometry_info = self._parse_obj_file(obj_file_path)
+                    
+                    # 流式写入增强的USD内容（包含完整几何数据），不在内存中拼接整个文件
+                    with io.TextIOWrapper(zipf.open(usd_info, 'w'), encoding='utf-8', newline='\n') as f:
+                        self._stream_enhanced_usd(
+                            f, obj_file_path, material_file_path, geometry_info
+                        )
+                else:
+                    # 几何数据已由OBJ文件打包提供，跳过解析，只写入静态USD
+                    zipf.writestr(usd_info, self._generate_basic_usd_from_obj(obj_file_path, material_file_path))
                 
-                # 写入USD文件
-                usd_file = temp_path / "model.usda"
-                with open(usd_file, 'w', encoding='utf-8') as f:
-                    f.write(usd_content)
-                
-                # 复制OBJ文件到临时目录
-                obj_dest = temp_path / Path(obj_file_path).name
-                shutil.copy2(obj_file_path, obj_dest)
-                
-                # 如果有材质文件，也复制过去
+                # 添加OBJ文件
+                self._add_file_to_usdz(zipf, obj_file_path, os.path.basename(obj_file_path))
+                # 添加材质文件
                 if material_file_path and os.path.exists(material_file_path):
-                    mtl_dest = temp_path / Path(material_file_path).name
-                    shutil.copy2(material_file_path, mtl_dest)
-                
-                # 创建USDZ包（实际上是一个ZIP文件）
-                # 使用无压缩模式，保持与材质修复工具一致
-                import zipfile
-                with zipfile.ZipFile(output_path, 'w', zipfile.ZIP_STORED) as zipf:
-                    # 添加USD文件
-                    zipf.write(usd_file, "model.usda")
-                    # 添加OBJ文件
-                    zipf.write(obj_dest, Path(obj_file_path).name)
-                    # 添加材质文件
-                    if material_file_path and os.path.exists(material_file_path):
-                        zipf.write(mtl_dest, Path(material_file_path).name)
-                
-                self.logger.info(f"TinyUSDZ轻量级转换完成: {output_path}")
-                return True, "轻量级转换成功"
-                
+                    self._add_file_to_usdz(zipf, material_file_path, os.path.basename(material_file_path))
+            
+            self.logger.info(f"TinyUSDZ轻量级转换完成: {output_path}")
+            return True, "轻量级转换成功"
+            
         except Exception as e:
             error_msg = f"轻量级转换方法失败: {str(e)}"
             self.logger.error(error_msg)
             return False, error_msg
     
+    def _usdz_zipinfo(self, zipf: zipfile.ZipFile, zinfo: zipfile.ZipInfo) -> zipfile.ZipInfo:
+        """
+        设置无压缩模式，并通过扩展字段填充使文件数据按64字节对齐
+        """
+        zinfo.compress_type = zipfile.ZIP_STORED
+        # 本地文件头: 30字节固定部分 + 文件名 + 扩展字段(4字节头 + 填充)
+        data_offset = zipf.fp.tell() + 30 + len(zinfo.filename.encode('utf-8')) + 4
+        padding = -data_offset % USDZ_ALIGNMENT
+        zinfo.extra = struct.pack('<HH', USDZ_PADDING_HEADER_ID, padding) + b'\0' * padding
+        return zinfo
+    
+    def _add_file_to_usdz(self, zipf: zipfile.ZipFile, file_path, arcname: str):
+        """
+        以无压缩、64字节对齐的方式将文件写入USDZ包
+        源文件通过mmap映射后按4MB切片直接写入，CRC32由zlib在映射内存上计算，不经过额外读缓冲
+        """
+        zinfo = self._usdz_zipinfo(zipf, zipfile.ZipInfo.from_file(file_path, arcname))
+        with open(file_path, 'rb') as src, zipf.open(zinfo, 'w') as dst:
+            if zinfo.file_size == 0:
+                # 空文件无法mmap
+                return
+            with mmap.mmap(src.fileno(), 0, access=mmap.ACCESS_READ) as mapped, memoryview(mapped) as view:
+                for start in range(0, len(view), USDZ_COPY_BUFFER_SIZE):
+                    dst.write(view[start:start + USDZ_COPY_BUFFER_SIZE])
+    
     def _generate_basic_usd_from_obj(self, obj_file_path: str, 
                                    material_file_path: Optional[str] = None) -> str:
         """
         从OBJ文件生成基本的USD内容
         """
-        obj_filename = Path(obj_file_path).name
-        mtl_filename = Path(material_file_path).name if material_file_path else None
-        
-        usd_content = f'''#usda 1.0
-(
-    defaultPrim = "Model"
-    metersPerUnit = 1
-    upAxis = "Y"
-    doc = "Generated by TinyUSDZ Converter"
-)
-
-def Xform "Model" (
-    kind = "component"
-)
-{{
-    def Mesh "mesh" (
-        prepend apiSchemas = ["MaterialBindingAPI"]
-    )
-    {{
-        # 引用OBJ文件
-        # 注意：这是一个简化的实现
-        # 实际的USD应该包含从OBJ解析的几何数据
-        
-        # 基本几何属性
-        uniform token subdivisionScheme = "none"
-        
-        # 材质绑定
-        rel material:binding = </Model/Materials/DefaultMaterial>
-    }}
+        # 内容与输入无关，直接返回预先生成的常量
+        return _BASIC_USD_CONTENT
     
-    def Scope "Materials"
-    {{
-        def Material "DefaultMaterial"
-        {{
-            token outputs:surface.connect = </Model/Materials/DefaultMaterial/DefaultSurface.outputs:surface>
-            
-            def Shader "DefaultSurface"
-            {{
-                uniform token info:id = "UsdPreviewSurface"
-                color3f inputs:diffuseColor = (0.8, 0.8, 0.8)
-                float inputs:metallic = 0.0
-                float inputs:roughness = 0.5
-                token outputs:surface
-            }}
-        }}
-    }}
-}}
-'''
-        
-        return usd_content
-    
-    def _parse_obj_file(self, obj_file_path: str) -> Dict[str, Any]:
+    def _parse_obj_file(self, obj_file_path: str, parse_normals: bool = False,
+                        parse_texcoords: bool = False) -> Dict[str, Any]:
         """
         解析OBJ文件获取几何信息
-        """
-        geometry_info = {
-            'vertices': [],
-            'faces': [],
-            'normals': [],
-            'texcoords': [],
-            'materials': [],
-            'vertex_count': 0,
-            'face_count': 0
-        }
+        结果按(路径, 修改时间, 文件大小)缓存，文件未变化时不重复解析
         
+        Args:
+            obj_file_path: OBJ文件路径
+            parse_normals: 是否解析法向量（vn）
+            parse_texcoords: 是否解析纹理坐标（vt）
+        """
         try:
-            with open(obj_file_path, 'r', encoding='utf-8') as f:
-                for line in f:
-                    line = line.strip()
-                    if line.startswith('v '):
-                        # 顶点坐标
-                        parts = line.split()
-                        if len(parts) >= 4:
-                            vertex = [float(parts[1]), float(parts[2]), float(parts[3])]
-                            geometry_info['vertices'].append(vertex)
-                    elif line.startswith('vn '):
-                        # 法向量
-                        parts = line.split()
-                        if len(parts) >= 4:
-                            normal = [float(parts[1]), float(parts[2]), float(parts[3])]
-                            geometry_info['normals'].append(normal)
-                    elif line.startswith('vt '):
-                        # 纹理坐标
-                        parts = line.split()
-                        if len(parts) >= 3:
-                            texcoord = [float(parts[1]), float(parts[2])]
-                            geometry_info['texcoords'].append(texcoord)
-                    elif line.startswith('f '):
-                        # 面
-                        parts = line.split()[1:]  # 跳过'f'
-                        face_indices = []
-                        for part in parts:
-                            # 处理 v/vt/vn 格式
-                            indices = part.split('/')
-                            if indices[0]:  # 顶点索引
-                                face_indices.append(int(indices[0]) - 1)  # OBJ索引从1开始
-                        if len(face_indices) >= 3:
-                            geometry_info['faces'].append(face_indices)
-                    elif line.startswith('usemtl '):
-                        # 材质
-                        material_name = line.split()[1]
-                        if material_name not in geometry_info['materials']:
-                            geometry_info['materials'].append(material_name)
-            
-            geometry_info['vertex_count'] = len(geometry_info['vertices'])
-            geometry_info['face_count'] = len(geometry_info['faces'])
-            
+            geometry_info = _parse_obj_cached(obj_file_path, parse_normals, parse_texcoords)
         except Exception as e:
             self.logger.warning(f"解析OBJ文件时出错: {e}")
+            return _empty_geometry_info()
         
-        return geometry_info
+        # 返回浅拷贝，几何数据本身为元组或只读数组，调用方无法修改缓存内容
+        return dict(geometry_info)
     
     def _generate_ios_compatible_usd_from_obj(self, obj_file_path: str, 
                                            material_file_path: Optional[str] = None,
@@ -288,113 +623,30 @@ def Xform "Model" (
         """
         生成iOS AR Quick Look兼容的USD内容
         """
+        buffer = io.StringIO()
+        self._stream_ios_compatible_usd(buffer, obj_file_path, material_file_path, geometry_info)
+        return buffer.getvalue()
+    
+    def _stream_ios_compatible_usd(self, out_fp, obj_file_path: str, 
+                                   material_file_path: Optional[str] = None,
+                                   geometry_info: Optional[Dict] = None):
+        """
+        将iOS AR Quick Look兼容的USD内容分块写入文件对象
+        """
         if not geometry_info:
             geometry_info = self._parse_obj_file(obj_file_path)
         
-        obj_filename = Path(obj_file_path).name
-        vertex_count = geometry_info.get('vertex_count', 0)
-        face_count = geometry_info.get('face_count', 0)
         vertices = geometry_info.get('vertices', [])
         faces = geometry_info.get('faces', [])
         
-        # 生成顶点数组
-        vertices_str = "point3f[] points = ["
-        if vertices:
-            vertex_strs = []
-            for v in vertices:
-                vertex_strs.append(f"({v[0]}, {v[1]}, {v[2]})")
-            vertices_str += ", ".join(vertex_strs)
-        vertices_str += "]"
-        
-        # 生成面数组
-        faces_str = "int[] faceVertexCounts = ["
-        face_indices_str = "int[] faceVertexIndices = ["
-        
-        if faces:
-            face_counts = []
-            face_indices = []
-            for face in faces:
-                face_counts.append(str(len(face)))
-                face_indices.extend([str(idx) for idx in face])
-            
-            faces_str += ", ".join(face_counts)
-            face_indices_str += ", ".join(face_indices)
-        
-        faces_str += "]"
-        face_indices_str += "]"
-        
-        # iOS AR Quick Look兼容的USD内容
-        usd_content = f'''#usda 1.0
-(
-    defaultPrim = "Crystal"
-    metersPerUnit = 1
-    upAxis = "Y"
-    startTimeCode = 1
-    endTimeCode = 1
-    timeCodesPerSecond = 24
-    doc = "Generated for iOS AR Quick Look compatibility"
-    comment = "Source: {obj_filename}, Vertices: {vertex_count}, Faces: {face_count}"
-)
-
-def Xform "Crystal" (
-    assetInfo = {{
-        string name = "Crystal Structure"
-    }}
-    kind = "component"
-)
-{{
-    matrix4d xformOp:transform = ( (1, 0, 0, 0), (0, 1, 0, 0), (0, 0, 1, 0), (0, 0, 0, 1) )
-    uniform token[] xformOpOrder = ["xformOp:transform"]
-
-    def Mesh "CrystalMesh" (
-        prepend apiSchemas = ["MaterialBindingAPI"]
-    )
-    {{
-        # 几何数据
-        {vertices_str}
-        {faces_str}
-        {face_indices_str}
-        
-        # 法向量（自动计算）
-        normal3f[] normals = []
-        
-        # 细分设置（对AR很重要）
-        uniform token subdivisionScheme = "none"
-        
-        # 材质绑定
-        rel material:binding = </Crystal/Materials/CrystalMaterial>
-        
-        # 显示设置
-        uniform token purpose = "default"
-        bool doubleSided = true
-        
-        # AR Quick Look特定设置
-        uniform token orientation = "rightHanded"
-    }}
-    
-    def Scope "Materials"
-    {{
-        def Material "CrystalMaterial"
-        {{
-            token outputs:surface.connect = </Crystal/Materials/CrystalMaterial/PBRShader.outputs:surface>
-            
-            def Shader "PBRShader"
-            {{
-                uniform token info:id = "UsdPreviewSurface"
-                color3f inputs:diffuseColor = (0.7, 0.8, 0.9)
-                float inputs:metallic = 0.2
-                float inputs:roughness = 0.3
-                float inputs:opacity = 0.9
-                color3f inputs:emissiveColor = (0.05, 0.05, 0.1)
-                float inputs:ior = 1.5
-                token outputs:surface
-            }}
-        }}
-    }}
-}}
-'''
-        
-        return usd_content
+        out_fp.writelines(_get_usd_template("ios.usda").generate(
+            obj_filename=os.path.basename(obj_file_path),
+            vertex_count=geometry_info.get('vertex_count', 0),
+            face_count=geometry_info.get('face_count', 0),
+            points=_join_array_chunks(vertices, _POINT_FORMAT),
+            face_vertex_counts=_join_array_chunks(faces, _format_face_size),
+            face_vertex_indices=_join_array_chunks(faces, _format_face),
+        ))
 
     def _generate_enhanced_usd_from_obj(self, obj_file_path: str, 
                                       material_file_path: Optional[str] = None,
@@ -402,126 +654,40 @@ def Xform "Crystal" (
         """
         从OBJ文件生成增强的USD内容
         """
-        obj_filename = Path(obj_file_path).name
-        mtl_filename = Path(material_file_path).name if material_file_path else None
-        
+        buffer = io.StringIO()
+        self._stream_enhanced_usd(buffer, obj_file_path, material_file_path, geometry_info)
+        return buffer.getvalue()
+    
+    def _stream_enhanced_usd(self, out_fp, obj_file_path: str, 
+                             material_file_path: Optional[str] = None,
+                             geometry_info: Optional[Dict] = None):
+        """
+        将增强的USD内容分块写入文件对象
+        """
         # 获取几何信息
         if geometry_info is None:
             geometry_info = self._parse_obj_file(obj_file_path)
         
-        vertex_count = geometry_info.get('vertex_count', 0)
-        face_count = geometry_info.get('face_count', 0)
-        materials = geometry_info.get('materials', [])
-        
-        # 生成顶点和面的数据（简化版本）
-        vertices_str = ""
-        faces_str = ""
-        
-        if geometry_info['vertices']:
-            # 转换顶点数据为USD格式
-            vertices_data = []
-            for vertex in geometry_info['vertices'][:100]:  # 限制顶点数量避免文件过大
-                vertices_data.append(f"({vertex[0]}, {vertex[1]}, {vertex[2]})")
-            vertices_str = f"point3f[] points = [{', '.join(vertices_data)}]"
-        
-        if geometry_info['faces']:
-            # 转换面数据为USD格式
-            faces_data = []
-            face_vertex_counts = []
-            for face in geometry_info['faces'][:50]:  # 限制面数量
-                if len(face) >= 3:
-                    faces_data.extend(face[:3])  # 只取前3个顶点（三角形）
-                    face_vertex_counts.append(3)
-            
-            if faces_data:
-                faces_str = f"int[] faceVertexIndices = [{', '.join(map(str, faces_data))}]\n        int[] faceVertexCounts = [{', '.join(map(str, face_vertex_counts))}]"
-        
-        # 材质信息
-        material_section = ""
-        if materials:
-            material_name = materials[0] if materials else "DefaultMaterial"
-            material_section = f"""
-        # 材质绑定
-        rel material:binding = </Model/Materials/{material_name}>
-        """
-        
-        materials_scope = ""
-        if materials:
-            materials_list = []
-            for i, mat_name in enumerate(materials[:3]):  # 最多3个材质
-                materials_list.append(f"""
-        def Material "{mat_name}"
-        {{
-            token outputs:surface.connect = </Model/Materials/{mat_name}/Surface.outputs:surface>
-            
-            def Shader "Surface"
-            {{
-                uniform token info:id = "UsdPreviewSurface"
-                color3f inputs:diffuseColor = ({0.7 + i*0.1}, {0.6 + i*0.1}, {0.5 + i*0.1})
-                float inputs:metallic = 0.1
-                float inputs:roughness = 0.6
-                token outputs:surface
-            }}
-        }}""")
-            
-            materials_scope = """
-    def Scope "Materials"
-    {"""
-            materials_scope += "".join(materials_list)
-            materials_scope += "\n    }"
-        else:
-            materials_scope = """
-    def Scope "Materials"
-    {
-        def Material "DefaultMaterial"
-        {
-            token outputs:surface.connect = </Model/Materials/DefaultMaterial/Surface.outputs:surface>
-            
-            def Shader "Surface"
-            {
-                uniform token info:id = "UsdPreviewSurface"
-                color3f inputs:diffuseColor = (0.8, 0.8, 0.8)
-                float inputs:metallic = 0.0
-                float inputs:roughness = 0.5
-                token outputs:surface
-            }
-        }
-    }"""
-        
-        usd_content = f'''#usda 1.0
-(
-    defaultPrim = "Model"
-    metersPerUnit = 1
-    upAxis = "Y"
-    doc = "Generated by TinyUSDZ Converter v0.9.0"
-    comment = "Source: {obj_filename}, Vertices: {vertex_count}, Faces: {face_count}"
-)
-
-def Xform "Model" (
-    kind = "component"
-)
-{{
-    def Mesh "mesh" (
-        prepend apiSchemas = ["MaterialBindingAPI"]
-    )
-    {{
-        # 几何数据
-        {vertices_str}
-        {faces_str}
-        
-        # 细分方案
-        uniform token subdivisionScheme = "none"
-        
-        # 法向量插值
-        uniform token faceVaryingLinearInterpolation = "cornersPlus1"
-        uniform token interpolateBoundary = "edgeAndCorner"
-        {material_section}
-    }}
-    {materials_scope}
-}}
-'''
-        
-        return usd_content
+        # 简化版本：限制顶点和面数量避免文件过大，面只取前3个顶点（三角形）
+        triangles = [face[:3] for face in geometry_info['faces'][:50] if len(face) >= 3]
+        
+        out_fp.writelines(_get_usd_template("enhanced.usda").generate(
+            obj_filename=os.path.basename(obj_file_path),
+            vertex_count=geometry_info.get('vertex_count', 0),
+            face_count=geometry_info.get('face_count', 0),
+            points=", ".join(map(_POINT_FORMAT, geometry_info['vertices'][:100])),
+            face_vertex_indices=", ".join(map(_TRIANGLE_FORMAT, triangles)),
+            face_vertex_counts=", ".join(["3"] * len(triangles)),
+            materials=[
+                {
+                    'name': mat_name,
+                    'r': round(_ENHANCED_MATERIAL_BASE_COLOR[0] + i * _ENHANCED_MATERIAL_COLOR_STEP, 3),
+                    'g': round(_ENHANCED_MATERIAL_BASE_COLOR[1] + i * _ENHANCED_MATERIAL_COLOR_STEP, 3),
+                    'b': round(_ENHANCED_MATERIAL_BASE_COLOR[2] + i * _ENHANCED_MATERIAL_COLOR_STEP, 3),
+                }
+                for i, mat_name in enumerate(geometry_info.get('materials', ())[:ENHANCED_USD_MAX_MATERIALS])
+            ],
+        ))
     
     def get_converter_info(self) -> Dict[str, Any]:
         """
@@ -540,6 +706,15 @@ def Xform "Model" (
             ]
         }
 
+def _convert_obj_to_usdz_in_worker(obj_file_path: str, output_path: str,
+                                   material_file_path: Optional[str],
+                                   embed_geometry: bool) -> Tuple[bool, str]:
+    # 进程池工作函数，必须定义在模块顶层才能被pickle
+    return TinyUSDZConverter().convert_obj_to_usdz(
+        obj_file_path, output_path, material_file_path, embed_geometry
+    )
+
+
 # 测试函数
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO)
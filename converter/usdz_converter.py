@@ -2,12 +2,182 @@
 USDZ转换器
 """
 import os
+import re
+import mmap
 import subprocess
 import platform
+from collections import namedtuple
+from contextlib import contextmanager
+from itertools import chain
 from typing import Optional
+import numpy as np
 from loguru import logger
+from utils.file_utils import get_shm_dir
 from .material_standardizer import material_standardizer
 
+# Pixar USD Python API（可选）：模块加载时探测一次，不可用时走简化转换
+try:
+    from pxr import Usd, UsdGeom, UsdShade, Sdf, UsdUtils, Vt
+    USD_AVAILABLE = True
+except ImportError:
+    USD_AVAILABLE = False
+
+# Numba（可选）：用于顶点法线累加
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+# 超过该大小的文件使用mmap映射读取，小文件直接read更快
+MMAP_MIN_FILE_SIZE = 64 * 1024
+
+# OBJ顶点行和面行（整行匹配，允许行首空白），在C层一次性扫描整个文件
+_OBJ_VERTEX_LINE = re.compile(rb'^[ \t]*v[ \t]+(.*?)[ \t\r]*$', re.MULTILINE)
+_OBJ_FACE_LINE = re.compile(rb'^[ \t]*f[ \t]+(.*?)[ \t\r]*$', re.MULTILINE)
+_OBJ_MATERIAL_LINE = re.compile(rb'^[ \t]*usemtl[ \t]+(\S+)', re.MULTILINE)
+# 面顶点引用中的 /vt/vn 部分
+_OBJ_FACE_REF_SUFFIX = re.compile(rb'/\S*')
+
+# 简化USDA中单个顶点的格式
+_USDA_POINT_FORMAT = "(%.6f, %.6f, %.6f)"
+
+# OBJ单次解析结果
+# face_material_ids: 每个面所用材质在material_names中的下标，未指定材质为-1
+ObjMeshData = namedtuple('ObjMeshData', [
+    'vertices', 'face_vertex_counts', 'face_vertex_indices',
+    'face_material_ids', 'material_names',
+])
+
+# 简化USDA的材质定义模板，在模块加载时定义一次，每种材质只做format
+_SIMPLE_MATERIAL_TEMPLATE = '''
+        def Material "{name}"
+        {{
+            token outputs:surface.connect = </Root/Materials/{name}/Surface.outputs:surface>
+            
+            def Shader "Surface"
+            {{
+                uniform token info:id = "UsdPreviewSurface"
+                color3f inputs:diffuseColor = ({r:.3f}, {g:.3f}, {b:.3f})
+                float inputs:metallic = 0.0
+                float inputs:roughness = 0.3
+                float inputs:opacity = 1.0
+                color3f inputs:emissiveColor = ({er:.3f}, {eg:.3f}, {eb:.3f})
+                token outputs:surface
+            }}
+        }}'''
+
+_SIMPLE_DEFAULT_MATERIAL = '''
+        def Material "DefaultMaterial"
+        {
+            token outputs:surface.connect = </Root/Materials/DefaultMaterial/Surface.outputs:surface>
+            
+            def Shader "Surface"
+            {
+                uniform token info:id = "UsdPreviewSurface"
+                color3f inputs:diffuseColor = (0.6, 0.6, 0.6)
+                float inputs:metallic = 0.0
+                float inputs:roughness = 0.5
+                token outputs:surface
+            }
+        }'''
+
+# 中间USD文件的预估大小不超过该值时放在内存文件系统中
+TEMP_USD_IN_MEMORY_MAX_SIZE = 32 * 1024 * 1024
+# 估算USDC大小时单个float3点与单个int的字节数（crate格式会压缩整数数组，估计偏保守）
+USDC_POINT_SIZE = 12
+USDC_INT_SIZE = 4
+
+# 实例上缓存的已解析MTL文件数量上限
+MTL_CACHE_MAX_ENTRIES = 32
+
+
+@contextmanager
+def _map_file(path: str):
+    """
+    以bytes接口读取文件：大文件mmap映射（多次扫描共享页缓存，无需复制到Python缓冲区），
+    小文件直接读入
+    """
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size > MMAP_MIN_FILE_SIZE:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                yield mapped
+        else:
+            yield f.read()
+
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True)
+    def _accumulate_fan_normals(vertices, face_vertex_counts, face_vertex_indices, normals):
+        """
+        逐面扇形三角化，把每个三角形的法线（边向量叉积，长度为面积的两倍）累加到三个顶点上
+        
+        单线程顺序累加：多个三角形共享顶点，并行写入同一行会产生竞争。
+        不做越界检查，调用前必须经过_check_face_arrays校验
+        """
+        start = 0
+        for face in range(face_vertex_counts.shape[0]):
+            count = face_vertex_counts[face]
+            a = face_vertex_indices[start]
+            for i in range(1, count - 1):
+                b = face_vertex_indices[start + i]
+                c = face_vertex_indices[start + i + 1]
+                e1x = vertices[b, 0] - vertices[a, 0]
+                e1y = vertices[b, 1] - vertices[a, 1]
+                e1z = vertices[b, 2] - vertices[a, 2]
+                e2x = vertices[c, 0] - vertices[a, 0]
+                e2y = vertices[c, 1] - vertices[a, 1]
+                e2z = vertices[c, 2] - vertices[a, 2]
+                nx = e1y * e2z - e1z * e2y
+                ny = e1z * e2x - e1x * e2z
+                nz = e1x * e2y - e1y * e2x
+                for corner in (a, b, c):
+                    normals[corner, 0] += nx
+                    normals[corner, 1] += ny
+                    normals[corner, 2] += nz
+            start += count
+
+
+def _check_face_arrays(vertex_count: int, face_vertex_counts: np.ndarray, face_vertex_indices: np.ndarray):
+    """校验面数组：每个面至少3个顶点、顶点数之和等于索引数、索引都在[0, vertex_count)内"""
+    if len(face_vertex_counts) and face_vertex_counts.min() < 3:
+        raise ValueError("存在少于3个顶点的面")
+    if face_vertex_counts.sum() != len(face_vertex_indices):
+        raise ValueError(f"面顶点数之和({face_vertex_counts.sum()})与索引数({len(face_vertex_indices)})不一致")
+    if len(face_vertex_indices) and (face_vertex_indices.min() < 0 or face_vertex_indices.max() >= vertex_count):
+        raise ValueError(f"面索引超出顶点范围[0, {vertex_count})")
+
+
+def triangulate_fan(face_vertex_counts: np.ndarray, face_vertex_indices: np.ndarray) -> np.ndarray:
+    """
+    扇形三角化：第k个顶点的面拆成k-2个三角形 (v0, vi, vi+1)，保持面的原始顺序
+    
+    全部用数组下标运算完成，不逐面循环；返回扁平的三角形顶点索引
+    """
+    triangle_counts = face_vertex_counts - 2
+    face_starts = np.cumsum(face_vertex_counts) - face_vertex_counts
+    # 每个三角形所属面的起始位置，以及它在面内的序号i（从1开始）
+    triangle_starts = np.repeat(face_starts, triangle_counts)
+    triangle_offsets = np.arange(len(triangle_starts)) - np.repeat(np.cumsum(triangle_counts) - triangle_counts, triangle_counts) + 1
+    corners = np.stack([triangle_starts, triangle_starts + triangle_offsets, triangle_starts + triangle_offsets + 1], axis=-1)
+    return face_vertex_indices[corners.ravel()]
+
+
+def _estimate_usd_size(mesh_data: ObjMeshData) -> int:
+    """粗略估计网格写成USDC后的大小（顶点和法线各一个float3数组，另加面数组）"""
+    return (len(mesh_data.vertices) * 2 * USDC_POINT_SIZE
+            + (len(mesh_data.face_vertex_counts) + len(mesh_data.face_vertex_indices)) * USDC_INT_SIZE)
+
+
+def _temp_usd_dir(estimated_size: int) -> Optional[str]:
+    """
+    为中间USD文件选择目录：文件较小且/dev/shm可写、空间充足时放在内存中，
+    否则返回None使用系统默认临时目录
+    """
+    if estimated_size > TEMP_USD_IN_MEMORY_MAX_SIZE:
+        return None
+    return get_shm_dir(2 * estimated_size)
+
 
 class USDZConverter:
     """USDZ转换器 - 基于Pixar USD Python API"""
@@ -15,14 +185,12 @@ class USDZConverter:
     def __init__(self):
         # 不再查找外部USD工具，直接使用Python USD API
         self.usd_converter_path = None
+        # MTL材质颜色缓存: MTL文件内容 -> {材质名: (r, g, b)}
+        self._mtl_cache = {}
     
     def is_available(self) -> bool:
         """检查USD转换器是否可用"""
-        try:
-            from pxr import Usd
-            return True
-        except ImportError:
-            return False
+        return USD_AVAILABLE
     
     def get_converter_info(self) -> dict:
         """获取转换器信息"""
@@ -39,13 +207,9 @@ class USDZConverter:
             ]
         }
         
-        # 尝试获取USD版本信息
-        if self.is_available():
-            try:
-                from pxr import Tf
-                info['version'] = 'Available (USD Python API)'
-            except:
-                info['version'] = 'Available (version check failed)'
+        # 获取USD版本信息
+        if info['available']:
+            info['version'] = 'USD %d.%d.%d' % Usd.GetVersion()
         
         return info
     
@@ -73,9 +237,12 @@ class USDZConverter:
         try:
             logger.info(f"开始转换 {obj_path} -> {usdz_path}")
             
+            # 标准化并读取材质，只做一次，USD API和简化转换共用
+            materials = self._prepare_materials(obj_path)
+            
             # 直接使用Python USD API
             logger.info("使用Pixar USD API转换")
-            success = self.convert_with_python_usd(obj_path, usdz_path)
+            success = self.convert_with_python_usd(obj_path, usdz_path, materials)
             
             if success:
                 return True, "Pixar USD转换成功"
@@ -90,23 +257,33 @@ class USDZConverter:
     
     # 移除Python脚本生成逻辑
     
-    def convert_with_python_usd(self, obj_path: str, usdz_path: str) -> bool:
+    def convert_with_python_usd(self, obj_path: str, usdz_path: str, materials: dict = None) -> bool:
         """
         使用Python USD API转换OBJ到USDZ
+        
+        Args:
+            materials: 已标准化的材质颜色，未提供时在此标准化并读取
         """
         try:
             logger.info("尝试使用Python USD API转换")
             
-            # 尝试导入USD Python包
-            try:
-                from pxr import Usd, UsdGeom, UsdShade, Sdf, UsdUtils, Gf, Vt
-            except ImportError:
+            # 首先标准化材质（使用标准CPK颜色），标准化会改写OBJ中的材质名，必须在解析前完成
+            if materials is None:
+                materials = self._prepare_materials(obj_path)
+            
+            if not USD_AVAILABLE:
                 logger.warning("USD Python包未安装，使用简化转换")
-                return self._simple_usd_conversion(obj_path, usdz_path)
+                return self._simple_usd_conversion(obj_path, usdz_path, materials)
             
-            # 使用临时USD文件名
+            # 单次解析OBJ几何和面材质绑定（材质名现在应该是标准化后的）
+            mesh_data = self._parse_obj_file(obj_path)
+            
+            # 使用临时USD文件名：USD不能直接写入.usdz，CreateNewUsdzPackage需要一个中间文件，
+            # 中间文件较小时放在内存文件系统中，打包时只有最终的.usdz落盘。
+            # 扩展名用.usdc明确使用二进制crate格式（.usd的格式取决于USD_DEFAULT_FILE_FORMAT环境变量）
             import tempfile
-            with tempfile.NamedTemporaryFile(suffix='.usd', delete=False) as tmp_usd:
+            with tempfile.NamedTemporaryFile(suffix='.usdc', delete=False,
+                                             dir=_temp_usd_dir(_estimate_usd_size(mesh_data))) as tmp_usd:
                 usd_path = tmp_usd.name
             
             try:
@@ -126,11 +303,12 @@ class USDZConverter:
                 # 设置根节点用途
                 root_prim.CreatePurposeAttr().Set(UsdGeom.Tokens.render)
                 
-                # 解析OBJ文件
-                vertices, faces = self._parse_obj_file(obj_path)
-                logger.info(f"解析OBJ: {len(vertices)}个顶点, {len(faces)}个面")
+                vertices = mesh_data.vertices
+                face_vertex_counts = mesh_data.face_vertex_counts
+                face_vertex_indices = mesh_data.face_vertex_indices
+                logger.info(f"解析OBJ: {len(vertices)}个顶点, {len(face_vertex_counts)}个面")
                 
-                if vertices and faces:
+                if len(vertices) and len(face_vertex_counts):
                     # 创建mesh - 优化版本
                     mesh_path = "/CrystalStructure/Geometry"
                     mesh = UsdGeom.Mesh.Define(stage, mesh_path)
@@ -153,125 +331,68 @@ class USDZConverter:
                     # 设置显示不透明度
                     mesh.CreateDisplayOpacityAttr().Set([1.0])
                     
-                    # 转换顶点数据为USD格式
-                    # 转换顶点数据为USD格式，确保数据完整性
-                    usd_vertices = []
-                    for v in vertices:
-                        if len(v) >= 3:
-                            usd_vertices.append(Gf.Vec3f(float(v[0]), float(v[1]), float(v[2])))
+                    # 转换顶点数据为USD格式：(N, 3) float32连续数组整体拷贝进Vt数组，不逐顶点构造Gf.Vec3f
+                    usd_vertices = Vt.Vec3fArray.FromNumpy(np.ascontiguousarray(vertices, dtype=np.float32))
                     
                     logger.info(f"转换顶点数据: {len(usd_vertices)}个顶点")
                     mesh.CreatePointsAttr().Set(usd_vertices)
                     
                     # 设置面数据
-                    face_vertex_counts = [len(face) for face in faces]
-                    face_vertex_indices = []
-                    for face in faces:
-                        face_vertex_indices.extend(face)
-                    
-                    mesh.CreateFaceVertexCountsAttr().Set(face_vertex_counts)
-                    mesh.CreateFaceVertexIndicesAttr().Set(face_vertex_indices)
+                    mesh.CreateFaceVertexCountsAttr().Set(Vt.IntArray.FromNumpy(face_vertex_counts))
+                    mesh.CreateFaceVertexIndicesAttr().Set(Vt.IntArray.FromNumpy(face_vertex_indices))
                     
                     # 计算并设置法线向量以改善渲染
                     try:
-                        # 为每个顶点计算法线
-                        normals = []
-                        for i in range(len(usd_vertices)):
-                            normals.append(Gf.Vec3f(0, 1, 0))  # 默认向上法线
-                        mesh.CreateNormalsAttr().Set(normals)
+                        # 为每个顶点计算平滑法线（相邻面法线按面积加权平均）
+                        normals = self._compute_vertex_normals(vertices, face_vertex_counts, face_vertex_indices)
+                        mesh.CreateNormalsAttr().Set(Vt.Vec3fArray.FromNumpy(normals))
                         mesh.SetNormalsInterpolation(UsdGeom.Tokens.vertex)
                     except Exception as e:
                         logger.warning(f"设置法线失败: {e}")
                     
                     # 创建支持原子颜色的材质系统
                     materials_created = {}
-                    face_materials = {}  # 存储面与材质的映射
+                    obj_materials = materials
                     
-                    # 首先标准化材质（使用标准CPK颜色）
-                    mtl_path = obj_path.replace('.obj', '.mtl')
-                    if os.path.exists(mtl_path):
-                        logger.info("正在标准化材质（使用标准CPK颜色）...")
-                        standardization_success = material_standardizer.standardize_obj_materials(obj_path, mtl_path, preserve_colors=False)
-                        if standardization_success:
-                            logger.info("材质标准化完成（已应用标准CPK颜色）")
-                        else:
-                            logger.warning("材质标准化失败，继续使用原始材质")
+                    materials_root = Sdf.Path("/CrystalStructure/Materials")
                     
-                    # 解析OBJ文件中的材质信息（现在应该是标准化后的）
-                    obj_materials = {}
-                    try:
-                        with open(obj_path, 'r') as obj_file:
-                            current_material = None
-                            face_index = 0
-                            
-                            for line in obj_file:
-                                line = line.strip()
-                                if line.startswith('usemtl '):
-                                    current_material = line.split()[1]
-                                elif line.startswith('f '):
-                                    if current_material:
-                                        face_materials[face_index] = current_material
-                                    face_index += 1
-                        
-                        # 读取MTL文件中的颜色（现在应该是标准化后的）
-                        if os.path.exists(mtl_path):
-                            with open(mtl_path, 'r') as mtl_file:
-                                current_mat = None
-                                for line in mtl_file:
-                                    line = line.strip()
-                                    if line.startswith('newmtl '):
-                                        current_mat = line.split()[1]
-                                    elif line.startswith('Kd ') and current_mat:
-                                        # 漫反射颜色
-                                        rgb = [float(x) for x in line.split()[1:4]]
-                                        obj_materials[current_mat] = tuple(rgb)
-                    except Exception as e:
-                        logger.warning(f"解析OBJ材质失败: {e}")
-                    
-                    # 为每种材质创建USD材质（现在使用标准化名称）
+                    # 为每种材质定义USD材质和PBR表面着色器（现在使用标准化名称）
                     for material_name, color in obj_materials.items():
-                        if material_name not in materials_created:
-                            # 使用标准化的材质路径
-                            material_path = f"/CrystalStructure/Materials/{material_name}"
-                            material = UsdShade.Material.Define(stage, material_path)
-                            
-                            # 创建PBR表面着色器
-                            shader_path = material_path + "/Shader"
-                            shader = UsdShade.Shader.Define(stage, shader_path)
-                            shader.CreateIdAttr("UsdPreviewSurface")
-                            
-                            # 使用标准化的CPK颜色
-                            shader.CreateInput("diffuseColor", Sdf.ValueTypeNames.Color3f).Set(color)
-                            shader.CreateInput("metallic", Sdf.ValueTypeNames.Float).Set(0.0)
-                            shader.CreateInput("roughness", Sdf.ValueTypeNames.Float).Set(0.3)
-                            shader.CreateInput("opacity", Sdf.ValueTypeNames.Float).Set(1.0)
-                            shader.CreateInput("ior", Sdf.ValueTypeNames.Float).Set(1.5)
-                            
-                            # 确保材质可见
-                            shader.CreateInput("useSpecularWorkflow", Sdf.ValueTypeNames.Int).Set(0)
-                            
-                            # 添加轻微的发光效果（让晶体更亮）
-                            emissive_factor = 0.1
-                            emissive_color = (
-                                color[0] * emissive_factor,
-                                color[1] * emissive_factor, 
-                                color[2] * emissive_factor
-                            )
-                            shader.CreateInput("emissiveColor", Sdf.ValueTypeNames.Color3f).Set(emissive_color)
-                            
-                            # 连接材质
-                            material.CreateSurfaceOutput().ConnectToSource(shader.ConnectableAPI(), "surface")
-                            materials_created[material_name] = material
-                            
-                            logger.debug(f"创建标准化材质: {material_name} 颜色: {color}")
+                        material_path = materials_root.AppendChild(material_name)
+                        material = UsdShade.Material.Define(stage, material_path)
+                        shader = UsdShade.Shader.Define(stage, material_path.AppendChild("Shader"))
+                        shader.CreateIdAttr("UsdPreviewSurface")
+                        
+                        # 使用标准化的CPK颜色
+                        shader.CreateInput("diffuseColor", Sdf.ValueTypeNames.Color3f).Set(color)
+                        shader.CreateInput("metallic", Sdf.ValueTypeNames.Float).Set(0.0)
+                        shader.CreateInput("roughness", Sdf.ValueTypeNames.Float).Set(0.3)
+                        shader.CreateInput("opacity", Sdf.ValueTypeNames.Float).Set(1.0)
+                        shader.CreateInput("ior", Sdf.ValueTypeNames.Float).Set(1.5)
+                        
+                        # 确保材质可见
+                        shader.CreateInput("useSpecularWorkflow", Sdf.ValueTypeNames.Int).Set(0)
+                        
+                        # 添加轻微的发光效果（让晶体更亮）
+                        emissive_factor = 0.1
+                        emissive_color = (
+                            color[0] * emissive_factor,
+                            color[1] * emissive_factor, 
+                            color[2] * emissive_factor
+                        )
+                        shader.CreateInput("emissiveColor", Sdf.ValueTypeNames.Color3f).Set(emissive_color)
+                        
+                        # 连接材质
+                        material.CreateSurfaceOutput().ConnectToSource(shader.ConnectableAPI(), "surface")
+                        materials_created[material_name] = material
+                        
+                        logger.debug(f"创建标准化材质: {material_name} 颜色: {color}")
                     
                     # 如果没有材质信息，创建默认的晶体材质
                     if not obj_materials:
-                        material_path = "/CrystalStructure/Materials/DefaultCrystal"
+                        material_path = materials_root.AppendChild("DefaultCrystal")
                         material = UsdShade.Material.Define(stage, material_path)
-                        
-                        shader_path = material_path + "/Shader"
-                        shader = UsdShade.Shader.Define(stage, shader_path)
+                        shader = UsdShade.Shader.Define(stage, material_path.AppendChild("Shader"))
                         shader.CreateIdAttr("UsdPreviewSurface")
                         
                         # 使用中性的晶体颜色
@@ -288,21 +409,26 @@ class USDZConverter:
                         UsdShade.MaterialBindingAPI(mesh).Bind(material)
                     else:
                         # 如果有多个材质，按面分配材质
-                        if len(materials_created) > 1 and face_materials:
-                            # 创建GeomSubset为不同材质分组
+                        if len(materials_created) > 1 and (mesh_data.face_material_ids >= 0).any():
+                            # 创建GeomSubset为不同材质分组：按材质编号稳定排序面序号，
+                            # 再用searchsorted找出每个编号的区间（未指定材质的-1排在最前，不属于任何区间）
+                            face_material_ids = mesh_data.face_material_ids
+                            face_order = np.argsort(face_material_ids, kind='stable').astype(np.int32)
+                            bounds = np.searchsorted(face_material_ids[face_order], np.arange(len(mesh_data.material_names) + 1))
                             material_face_groups = {}
-                            for face_idx, material_name in face_materials.items():
-                                if material_name not in material_face_groups:
-                                    material_face_groups[material_name] = []
-                                material_face_groups[material_name].append(face_idx)
+                            for material_id, material_name in enumerate(mesh_data.material_names):
+                                start, end = bounds[material_id], bounds[material_id + 1]
+                                if start < end:
+                                    material_face_groups[material_name] = face_order[start:end]
                             
                             # 为每个材质创建GeomSubset
+                            created_materials = materials_created.keys()
                             for material_name, face_indices in material_face_groups.items():
-                                if material_name in materials_created:
+                                if material_name in created_materials:
                                     subset_path = f"{mesh_path}/{material_name}_subset"
                                     subset = UsdGeom.Subset.Define(stage, subset_path)
                                     subset.CreateElementTypeAttr().Set(UsdGeom.Tokens.face)
-                                    subset.CreateIndicesAttr().Set(face_indices)
+                                    subset.CreateIndicesAttr().Set(Vt.IntArray.FromNumpy(face_indices))
                                     subset.CreateFamilyNameAttr().Set("materialBind")
                                     
                                     # 绑定材质到subset
@@ -310,7 +436,7 @@ class USDZConverter:
                                     logger.info(f"为材质 {material_name} 创建了包含 {len(face_indices)} 个面的subset")
                         else:
                             # 绑定第一个材质作为默认
-                            first_material = list(materials_created.values())[0]
+                            first_material = next(iter(materials_created.values()))
                             UsdShade.MaterialBindingAPI(mesh).Bind(first_material)
                     
                     # 保存stage
@@ -320,11 +446,15 @@ class USDZConverter:
                     try:
                         # 使用Apple推荐的包创建方法
                         success = UsdUtils.CreateNewUsdzPackage(usd_path, usdz_path)
-                        if success and os.path.exists(usdz_path):
+                        # 一次stat同时判断文件是否存在并取得大小
+                        try:
+                            usdz_size = os.stat(usdz_path).st_size if success else None
+                        except FileNotFoundError:
+                            usdz_size = None
+                        if usdz_size is not None:
                             logger.info(f"USDZ包创建成功: {usdz_path}")
                             
                             # 验证USDZ质量
-                            usdz_size = os.path.getsize(usdz_path)
                             if usdz_size > 50000:  # 50KB以上认为质量良好
                                 logger.info(f"USDZ质量验证通过: {usdz_size} bytes")
                                 return True
@@ -337,7 +467,7 @@ class USDZConverter:
                     except Exception as e:
                         logger.error(f"USDZ包创建异常: {e}")
                         # 创建优化的备用方案
-                        return self._simple_usd_conversion(obj_path, usdz_path)
+                        return self._simple_usd_conversion(obj_path, usdz_path, materials)
                 else:
                     logger.error("OBJ文件解析失败，无顶点或面数据")
                     return False
@@ -345,144 +475,238 @@ class USDZConverter:
             finally:
                 # 清理临时USD文件
                 try:
-                    if os.path.exists(usd_path):
-                        os.unlink(usd_path)
+                    os.unlink(usd_path)
                 except:
                     pass
             
         except Exception as e:
             logger.error(f"Python USD转换失败: {e}")
-            return self._simple_usd_conversion(obj_path, usdz_path)
+            return self._simple_usd_conversion(obj_path, usdz_path, materials)
     
-    def _parse_obj_file(self, obj_path: str):
-        """解析OBJ文件获取顶点和面"""
-        vertices = []
-        faces = []
+    def _prepare_materials(self, obj_path: str) -> dict:
+        """标准化OBJ对应的MTL材质（使用标准CPK颜色），返回标准化后的材质颜色"""
+        mtl_path = obj_path.replace('.obj', '.mtl')
+        if not os.path.exists(mtl_path):
+            return {}
+        
+        logger.info("正在标准化材质（使用标准CPK颜色）...")
+        standardization_success = material_standardizer.standardize_obj_materials(obj_path, mtl_path, preserve_colors=False)
+        if standardization_success:
+            logger.info("材质标准化完成（已应用标准CPK颜色）")
+        else:
+            logger.warning("材质标准化失败，继续使用原始材质")
+        
+        return self._load_materials(mtl_path)
+    
+    def _load_materials(self, mtl_path: str) -> dict:
+        """
+        读取MTL材质颜色，按文件内容缓存，内容相同（如元素组成相同的结构）时不重复解析
         
+        标准化会原地改写MTL，修改时间和大小可能不变，因此不用文件状态作缓存键
+        """
         try:
-            with open(obj_path, 'r') as f:
-                for line in f:
-                    line = line.strip()
-                    if line.startswith('v '):
-                        # 顶点坐标
-                        parts = line.split()
-                        if len(parts) >= 4:
-                            vertices.append((float(parts[1]), float(parts[2]), float(parts[3])))
-                    elif line.startswith('f '):
-                        # 面信息
-                        parts = line.split()[1:]
-                        face = []
-                        for part in parts:
-                            # 处理格式如 "1/1/1" 或 "1//1" 或 "1"
-                            vertex_idx = int(part.split('/')[0]) - 1  # OBJ索引从1开始
-                            face.append(vertex_idx)
-                        if len(face) >= 3:
-                            faces.append(face)
+            with open(mtl_path, 'rb') as f:
+                mtl_data = f.read()
+        except OSError:
+            return {}
+        
+        materials = self._mtl_cache.get(mtl_data)
+        if materials is None:
+            try:
+                materials = self._parse_mtl_colors(mtl_data)
+            except Exception as e:
+                logger.warning(f"解析MTL材质失败: {e}")
+                return {}
+            if len(self._mtl_cache) >= MTL_CACHE_MAX_ENTRIES:
+                # 淘汰最早加入的条目
+                self._mtl_cache.pop(next(iter(self._mtl_cache)))
+            self._mtl_cache[mtl_data] = materials
+        return materials
+    
+    def _parse_mtl_colors(self, mtl_data: bytes) -> dict:
+        """读取MTL内容中各材质的漫反射颜色(Kd)"""
+        materials = {}
+        current_mat = None
+        for line in mtl_data.splitlines():
+            line = line.strip()
+            if line.startswith(b'newmtl '):
+                current_mat = line.split()[1].decode('utf-8')
+            elif line.startswith(b'Kd ') and current_mat:
+                # 漫反射颜色
+                rgb = [float(x) for x in line.split()[1:4]]
+                materials[current_mat] = tuple(rgb)
+        return materials
+    
+    def _parse_obj_file(self, obj_path: str) -> ObjMeshData:
+        """
+        单次解析OBJ文件的顶点、面及每个面的材质绑定
+        
+        用正则一次性提取顶点行和面行（按usemtl行分段得到面的材质），数值转换交给NumPy在C层完成
+        
+        Returns:
+            ObjMeshData。vertices为(N, 3) float64数组，面以USD的扁平形式表示：
+            每个面的顶点数(int32)和按顺序拼接的顶点索引(int32，从0开始)
+        """
+        vertices = np.empty((0, 3), dtype=np.float64)
+        face_vertex_counts = np.empty(0, dtype=np.int32)
+        face_vertex_indices = np.empty(0, dtype=np.int32)
+        face_material_ids = np.empty(0, dtype=np.int32)
+        material_ids = {}
+        
+        try:
+            # 正则直接在映射的字节数据上扫描，不解码、不复制整个文件
+            with _map_file(obj_path) as data:
+                vertex_rows = _OBJ_VERTEX_LINE.findall(data)
+                
+                # 以usemtl行为界分段，同一段内的面使用同一材质（第一个usemtl之前为-1）
+                face_rows = []
+                segment_ids = []
+                segment_sizes = []
+                segment_start, material_id = 0, -1
+                for match in chain(_OBJ_MATERIAL_LINE.finditer(data), [None]):
+                    segment_end = match.start() if match else len(data)
+                    rows = _OBJ_FACE_LINE.findall(data, segment_start, segment_end)
+                    face_rows.extend(rows)
+                    segment_ids.append(material_id)
+                    segment_sizes.append(len(rows))
+                    if match:
+                        name = match.group(1).decode('utf-8', errors='replace')
+                        material_id = material_ids.setdefault(name, len(material_ids))
+                        segment_start = match.end()
+            
+            # 顶点坐标
+            if vertex_rows:
+                vertices = self._parse_obj_vertex_rows(vertex_rows)
+            
+            # 面信息，去掉 "1/1/1" 或 "1//1" 中的纹理/法线引用，只保留顶点索引
+            if face_rows:
+                face_rows = _OBJ_FACE_REF_SUFFIX.sub(b'', b'\n'.join(face_rows)).split(b'\n')
+                counts = np.fromiter(map(len, map(bytes.split, face_rows)), dtype=np.int32, count=len(face_rows))
+                indices = np.array(b' '.join(face_rows).split(), dtype=np.int32) - 1  # OBJ索引从1开始
+                material_of_face = np.repeat(np.array(segment_ids, dtype=np.int32), segment_sizes)
+                # 丢弃少于3个顶点的面
+                valid = counts >= 3
+                if not valid.all():
+                    indices = indices[np.repeat(valid, counts)]
+                    counts = counts[valid]
+                    material_of_face = material_of_face[valid]
+                face_vertex_counts, face_vertex_indices = counts, indices
+                face_material_ids = material_of_face
+            
+            # 合并坐标完全相同的重复顶点
+            if len(vertices) and len(face_vertex_indices):
+                vertices, face_vertex_indices = self._deduplicate_vertices(vertices, face_vertex_indices)
                             
         except Exception as e:
             logger.error(f"解析OBJ文件失败: {e}")
             
-        logger.info(f"解析OBJ: {len(vertices)}个顶点, {len(faces)}个面")
-        return vertices, faces
+        logger.info(f"解析OBJ: {len(vertices)}个顶点, {len(face_vertex_counts)}个面")
+        return ObjMeshData(vertices, face_vertex_counts, face_vertex_indices,
+                           face_material_ids, list(material_ids))
+    
+    def _parse_obj_vertex_rows(self, vertex_rows: list) -> np.ndarray:
+        """将顶点行（不含前缀v）转换为(N, 3)坐标数组，忽略w分量或顶点颜色等额外列"""
+        column_count = len(vertex_rows[0].split())
+        values = np.array(b' '.join(vertex_rows).split(), dtype=np.float64)
+        if column_count >= 3 and values.size == column_count * len(vertex_rows):
+            # 所有行列数一致，直接整体重排
+            return values.reshape(-1, column_count)[:, :3]
+        # 列数不一致时逐行取前三个坐标
+        rows = [row.split()[:3] for row in vertex_rows]
+        return np.array([row for row in rows if len(row) == 3], dtype=np.float64).reshape(-1, 3)
+    
+    def _deduplicate_vertices(self, vertices: np.ndarray, face_vertex_indices: np.ndarray):
+        """
+        合并坐标完全相同的顶点并重映射面索引，保留顶点首次出现的顺序
+        
+        索引越界时原样返回，交给后续的USD校验处理
+        """
+        if face_vertex_indices.min() < 0 or face_vertex_indices.max() >= len(vertices):
+            return vertices, face_vertex_indices
+        
+        _, first_index, inverse = np.unique(vertices, axis=0, return_index=True, return_inverse=True)
+        if len(first_index) == len(vertices):
+            return vertices, face_vertex_indices
+        
+        # np.unique按坐标排序，这里换回按首次出现排序
+        order = np.argsort(first_index)
+        rank = np.empty_like(order)
+        rank[order] = np.arange(len(order))
+        remap = rank[inverse.reshape(-1)].astype(np.int32)
+        
+        logger.info(f"合并重复顶点: {len(vertices)} -> {len(first_index)}")
+        return vertices[first_index[order]], remap[face_vertex_indices]
+    
+    def _compute_vertex_normals(self, vertices: np.ndarray, face_vertex_counts: np.ndarray,
+                                face_vertex_indices: np.ndarray) -> np.ndarray:
+        """
+        计算顶点法线：各面三角化后的叉积（长度即面积的两倍）累加到顶点上再归一化
+        
+        Returns:
+            (N, 3) float32数组；不属于任何面的顶点使用默认向上法线(0, 1, 0)
+        
+        Raises:
+            ValueError: 面数组不合法（索引越界等）
+        """
+        _check_face_arrays(len(vertices), face_vertex_counts, face_vertex_indices)
+        normals = np.zeros((len(vertices), 3), dtype=np.float64)
+        if NUMBA_AVAILABLE:
+            _accumulate_fan_normals(np.ascontiguousarray(vertices, dtype=np.float64),
+                                    face_vertex_counts, face_vertex_indices, normals)
+        else:
+            triangles = triangulate_fan(face_vertex_counts, face_vertex_indices).reshape(-1, 3)
+            corners = vertices[triangles]
+            face_normals = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+            # bincount按顶点分桶求和，比无缓冲的np.add.at快得多
+            for corner in range(3):
+                for axis in range(3):
+                    normals[:, axis] += np.bincount(triangles[:, corner], weights=face_normals[:, axis],
+                                                    minlength=len(vertices))
+        
+        lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+        degenerate = lengths[:, 0] < 1e-12
+        normals[degenerate] = (0.0, 1.0, 0.0)
+        lengths[degenerate] = 1.0
+        return np.ascontiguousarray(normals / lengths, dtype=np.float32)
     
     def _simple_usd_conversion(self, obj_path: str, usdz_path: str, materials: dict = None) -> bool:
         """简化的USD转换（当Python USD不可用时）"""
         try:
+            # 没有传入已标准化的材质时，首先标准化材质（使用标准CPK颜色）
+            if materials is None:
+                materials = self._prepare_materials(obj_path)
+            
             # 解析OBJ文件获取几何数据
-            vertices, faces = self._parse_obj_file(obj_path)
-            if not vertices or not faces:
+            mesh_data = self._parse_obj_file(obj_path)
+            vertices = mesh_data.vertices
+            face_sizes = mesh_data.face_vertex_counts
+            flat_face_indices = mesh_data.face_vertex_indices
+            if not len(vertices) or not len(face_sizes):
                 logger.error("OBJ文件中没有找到有效的几何数据")
                 return False
             
-            # 首先标准化材质（使用标准CPK颜色）
-            mtl_path = obj_path.replace('.obj', '.mtl')
-            if os.path.exists(mtl_path):
-                logger.info("正在标准化材质（使用标准CPK颜色）...")
-                standardization_success = material_standardizer.standardize_obj_materials(obj_path, mtl_path, preserve_colors=False)
-                if standardization_success:
-                    logger.info("材质标准化完成（已应用标准CPK颜色）")
-                else:
-                    logger.warning("材质标准化失败，继续使用原始材质")
-            
-            # 如果没有提供材质信息，重新解析标准化后的材质
-            if not materials:
-                materials = {}
-                if os.path.exists(mtl_path):
-                    try:
-                        with open(mtl_path, 'r') as mtl_file:
-                            current_mat = None
-                            for line in mtl_file:
-                                line = line.strip()
-                                if line.startswith('newmtl '):
-                                    current_mat = line.split()[1]
-                                elif line.startswith('Kd ') and current_mat:
-                                    rgb = [float(x) for x in line.split()[1:4]]
-                                    materials[current_mat] = tuple(rgb)
-                    except Exception as e:
-                        logger.warning(f"解析标准化材质失败: {e}")
-            
             # 生成材质定义
-            materials_usd = ""
             if materials:
-                for mat_name, color in materials.items():
-                    materials_usd += f'''
-        def Material "{mat_name}"
-        {{
-            token outputs:surface.connect = </Root/Materials/{mat_name}/Surface.outputs:surface>
-            
-            def Shader "Surface"
-            {{
-                uniform token info:id = "UsdPreviewSurface"
-                color3f inputs:diffuseColor = ({color[0]:.3f}, {color[1]:.3f}, {color[2]:.3f})
-                float inputs:metallic = 0.0
-                float inputs:roughness = 0.3
-                float inputs:opacity = 1.0
-                color3f inputs:emissiveColor = ({color[0]*0.1:.3f}, {color[1]*0.1:.3f}, {color[2]*0.1:.3f})
-                token outputs:surface
-            }}
-        }}'''
+                materials_usd = "".join([
+                    _SIMPLE_MATERIAL_TEMPLATE.format(
+                        name=mat_name, r=color[0], g=color[1], b=color[2],
+                        er=color[0] * 0.1, eg=color[1] * 0.1, eb=color[2] * 0.1,
+                    )
+                    for mat_name, color in materials.items()
+                ])
             else:
                 # 默认材质
-                materials_usd = '''
-        def Material "DefaultMaterial"
-        {{
-            token outputs:surface.connect = </Root/Materials/DefaultMaterial/Surface.outputs:surface>
-            
-            def Shader "Surface"
-            {{
-                uniform token info:id = "UsdPreviewSurface"
-                color3f inputs:diffuseColor = (0.6, 0.6, 0.6)
-                float inputs:metallic = 0.0
-                float inputs:roughness = 0.5
-                token outputs:surface
-            }}
-        }}'''
+                materials_usd = _SIMPLE_DEFAULT_MATERIAL
             
-            # 准备几何数据
-            points_str = ", ".join([f"({v[0]:.6f}, {v[1]:.6f}, {v[2]:.6f})" for v in vertices])
+            # 准备几何数据：所有坐标用一次%格式化完成，不逐顶点构造f-string
+            points_str = ", ".join([_USDA_POINT_FORMAT] * len(vertices)) % tuple(vertices.ravel().tolist())
             
             # 准备面数据（转换为三角形）
-            face_vertex_counts = []
-            face_vertex_indices = []
-            
-            for face in faces:
-                if len(face) == 3:
-                    # 三角形
-                    face_vertex_counts.append(3)
-                    face_vertex_indices.extend(face)
-                elif len(face) == 4:
-                    # 四边形，分割为两个三角形
-                    face_vertex_counts.extend([3, 3])
-                    face_vertex_indices.extend([face[0], face[1], face[2]])
-                    face_vertex_indices.extend([face[0], face[2], face[3]])
-                elif len(face) > 4:
-                    # 多边形，扇形三角化
-                    for i in range(1, len(face) - 1):
-                        face_vertex_counts.append(3)
-                        face_vertex_indices.extend([face[0], face[i], face[i + 1]])
+            face_vertex_indices = triangulate_fan(face_sizes, flat_face_indices)
             
-            face_counts_str = "[" + ", ".join(map(str, face_vertex_counts)) + "]"
-            face_indices_str = "[" + ", ".join(map(str, face_vertex_indices)) + "]"
+            # 三角化后每个面都是3个顶点，直接重复常量；索引与顶点一样用一次%格式化
+            face_counts_str = "[" + ", ".join(["3"] * (len(face_vertex_indices) // 3)) + "]"
+            face_indices_str = "[" + ", ".join(["%d"] * len(face_vertex_indices)) % tuple(face_vertex_indices.tolist()) + "]"
             
             # 创建包含几何数据的USD文件内容
             usd_content = f"""#usda 1.0
@@ -518,18 +742,11 @@ def Xform "Root" (
 }}
 """
             
-            # 写入USD文件
-            usd_path = usdz_path.replace('.usdz', '.usd')
-            with open(usd_path, 'w', encoding='utf-8') as f:
+            # 创建简单的USDZ（实际上是USD文本），直接写入目标文件，不再经中间.usd文件复制再删除
+            with open(usdz_path, 'w', encoding='utf-8') as f:
                 f.write(usd_content)
-            
-            # 创建简单的USDZ（实际上是重命名的USD）
-            if os.path.exists(usd_path):
-                import shutil
-                shutil.copy2(usd_path, usdz_path)
-                os.remove(usd_path)
-                logger.info(f"创建简化USDZ文件: {usdz_path}（包含{len(materials)}种标准化材质）")
-                return True
+            logger.info(f"创建简化USDZ文件: {usdz_path}（包含{len(materials)}种标准化材质）")
+            return True
                 
         except Exception as e:
             logger.error(f"简化USD转换失败: {e}")
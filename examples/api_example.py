@@ -14,12 +14,38 @@ Crystal3D API 使用示例
 """
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
+import hashlib
 import time
 import os
+from concurrent.futures import ThreadPoolExecutor
+from itertools import repeat
 from pathlib import Path
 from typing import List, Dict, Optional
 
+# 任务轮询间隔：从短间隔开始，每次翻倍直到上限，短任务能很快拿到结果
+POLL_INITIAL_INTERVAL = 0.1
+POLL_MAX_INTERVAL = 2.0
+
+# 连接池大小需不小于批量转换的并发数，否则多出的连接用完即丢弃，无法复用
+HTTP_POOL_SIZE = 50
+
+# 下载结果时每次写入磁盘的块大小
+DOWNLOAD_CHUNK_SIZE = 1 << 20
+
+
+def _file_sha256(file_path: str) -> str:
+    """计算文件内容的SHA-256，分块读取，不把整个文件读入内存"""
+    with open(file_path, 'rb') as f:
+        if hasattr(hashlib, 'file_digest'):  # Python 3.11+
+            return hashlib.file_digest(f, 'sha256').hexdigest()
+        digest = hashlib.sha256()
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+        return digest.hexdigest()
+
 
 class Crystal3DClient:
     """Crystal3D API客户端"""
@@ -27,6 +53,18 @@ class Crystal3DClient:
     def __init__(self, base_url: str = "http://localhost:8000"):
         self.base_url = base_url.rstrip('/')
         self.session = requests.Session()
+        # 已上传文件的内容哈希 -> 上传结果，内容相同的文件不再重复上传
+        self._uploads: Dict[str, Dict] = {}
+        
+        # 扩大连接池并对网关错误自动重试（默认不重试POST等非幂等请求）
+        adapter = HTTPAdapter(
+            pool_connections=HTTP_POOL_SIZE,
+            pool_maxsize=HTTP_POOL_SIZE,
+            max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[502, 503, 504],
+                              raise_on_status=False)
+        )
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
     
     def health_check(self) -> bool:
         """检查服务是否可用"""
@@ -37,18 +75,26 @@ class Crystal3DClient:
             return False
     
     def upload_file(self, file_path: str) -> Optional[Dict]:
-        """上传CIF文件"""
+        """上传CIF文件（内容与已上传文件相同时直接复用上次的结果）"""
         if not os.path.exists(file_path):
             print(f"❌ 文件不存在: {file_path}")
             return None
         
         try:
+            content_hash = _file_sha256(file_path)
+            uploaded = self._uploads.get(content_hash)
+            if uploaded:
+                print(f"♻️  内容相同的文件已上传，跳过: {os.path.basename(file_path)}")
+                print(f"   文件ID: {uploaded.get('file_id')}")
+                return uploaded
+            
             with open(file_path, 'rb') as f:
                 files = {'file': (os.path.basename(file_path), f, 'chemical/x-cif')}
                 response = self.session.post(f"{self.base_url}/api/upload", files=files)
             
             if response.status_code == 200:
                 result = response.json()
+                self._uploads[content_hash] = result
                 print(f"✅ 文件上传成功: {os.path.basename(file_path)}")
                 print(f"   文件ID: {result.get('file_id')}")
                 return result
@@ -102,11 +148,13 @@ class Crystal3DClient:
             return None
     
     def download_result(self, task_id: str, output_dir: str = "./output") -> Optional[str]:
-        """下载转换结果"""
+        """下载转换结果（流式写入磁盘，不把整个USDZ读入内存）"""
         try:
-            response = self.session.get(f"{self.base_url}/api/download/{task_id}")
-            
-            if response.status_code == 200:
+            with self.session.get(f"{self.base_url}/api/download/{task_id}", stream=True) as response:
+                if response.status_code != 200:
+                    print(f"❌ 下载失败: {response.status_code}")
+                    return None
+                
                 # 创建输出目录
                 os.makedirs(output_dir, exist_ok=True)
                 
@@ -122,21 +170,20 @@ class Crystal3DClient:
                 output_path = os.path.join(output_dir, filename)
                 
                 with open(output_path, 'wb') as f:
-                    f.write(response.content)
-                
-                print(f"✅ 文件下载成功: {output_path}")
-                return output_path
-            else:
-                print(f"❌ 下载失败: {response.status_code}")
-                return None
+                    for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                        f.write(chunk)
+            
+            print(f"✅ 文件下载成功: {output_path}")
+            return output_path
         
         except Exception as e:
             print(f"❌ 下载异常: {str(e)}")
             return None
     
     def wait_for_completion(self, task_id: str, timeout: int = 300) -> bool:
-        """等待任务完成"""
+        """等待任务完成（轮询间隔指数增长，上限为POLL_MAX_INTERVAL秒）"""
         start_time = time.time()
+        interval = POLL_INITIAL_INTERVAL
         
         while time.time() - start_time < timeout:
             status = self.get_task_status(task_id)
@@ -155,10 +202,11 @@ class Crystal3DClient:
                 return False
             elif state in ['pending', 'processing']:
                 print(f"⏳ 任务进行中: {state}...")
-                time.sleep(2)
             else:
                 print(f"⚠️  未知任务状态: {state}")
-                time.sleep(2)
+            
+            time.sleep(interval)
+            interval = min(interval * 2, POLL_MAX_INTERVAL)
         
         print(f"⏰ 任务超时: {task_id}")
         return False
@@ -197,8 +245,25 @@ def convert_single_file(client: Crystal3DClient, file_path: str, output_dir: str
     return output_path is not None
 
 
-def batch_convert(client: Crystal3DClient, input_dir: str, output_dir: str = "./output") -> None:
-    """批量转换目录中的所有CIF文件"""
+def _convert_batch_item(client: Crystal3DClient, cif_file: Path, output_dir: str) -> bool:
+    """转换批量任务中的单个文件"""
+    try:
+        if convert_single_file(client, str(cif_file), output_dir):
+            return True
+        print(f"❌ 转换失败: {cif_file.name}")
+    except Exception as e:
+        print(f"❌ 处理异常 {cif_file.name}: {str(e)}")
+    return False
+
+
+def batch_convert(client: Crystal3DClient, input_dir: str, output_dir: str = "./output",
+                  max_workers: int = 5) -> None:
+    """
+    批量转换目录中的所有CIF文件
+    
+    每个文件的上传、轮询和下载主要是等待网络，因此用线程池并发处理，
+    max_workers限制同时进行的转换数，避免压垮服务端
+    """
     input_path = Path(input_dir)
     
     if not input_path.exists():
@@ -214,16 +279,12 @@ def batch_convert(client: Crystal3DClient, input_dir: str, output_dir: str = "./
     
     print(f"📁 找到 {len(cif_files)} 个CIF文件")
     
-    success_count = 0
-    
-    for cif_file in cif_files:
-        try:
-            if convert_single_file(client, str(cif_file), output_dir):
-                success_count += 1
-            else:
-                print(f"❌ 转换失败: {cif_file.name}")
-        except Exception as e:
-            print(f"❌ 处理异常 {cif_file.name}: {str(e)}")
+    workers = max(1, min(max_workers, len(cif_files)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(
+            _convert_batch_item, repeat(client), cif_files, repeat(output_dir)
+        ))
+    success_count = sum(results)
     
     print(f"\n📊 批量转换完成: {success_count}/{len(cif_files)} 成功")
 
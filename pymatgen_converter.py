@@ -9,10 +9,12 @@ pymatgen是Materials Project开发的材料科学Python库，
 """
 
 import os
-import math
+from collections import Counter
+from functools import lru_cache
 import numpy as np
 from loguru import logger
 from typing import List, Tuple, Dict, Optional, Any
+from utils.file_utils import cached_by_stat
 
 try:
     from pymatgen.core import Structure
@@ -26,6 +28,60 @@ except ImportError as e:
     logger.error("请运行: pip install pymatgen")
     PYMATGEN_AVAILABLE = False
 
+@cached_by_stat(maxsize=32)
+def _parse_cif_cached(cif_file: str) -> "Structure":
+    """
+    解析CIF文件中的第一个结构（完整晶胞，不约化为原胞）
+    同一CIF在预览、导出等多次转换之间只解析一次；结构为可变对象，调用方须copy后再修改
+    """
+    parser = CifParser(cif_file)
+    # 使用parse_structures并设置primitive=False获取完整晶胞
+    structures = parser.parse_structures(primitive=False)
+    return structures[0]  # 获取第一个结构
+
+# OBJ顶点/面的行格式
+OBJ_VERTEX_FORMAT = 'v %.6f %.6f %.6f\n'
+OBJ_FACE_FORMAT = 'f %d %d %d\n'
+
+def _write_obj_rows(f, rows: np.ndarray, row_format: str) -> None:
+    """
+    将(N, 3)数组按行格式整块写入OBJ文件
+    整块只做一次字符串格式化，比逐行f-string快得多
+    """
+    values = np.asarray(rows).ravel().tolist()
+    f.write(row_format * (len(values) // 3) % tuple(values))
+
+@lru_cache(maxsize=8)
+def _unit_sphere(resolution: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    按分辨率缓存单位球网格：顶点方向和面索引只与分辨率有关，所有原子共用
+    返回的数组为只读，调用方缩放平移时会生成新数组
+    """
+    i = np.arange(resolution + 1)
+    j = np.arange(resolution * 2)
+    lat = np.pi * (-0.5 + i / resolution)
+    lon = 2 * np.pi * j / (resolution * 2)
+    
+    # 按纬线逐圈、每圈按经线排列顶点
+    vertices = np.empty((len(lat), len(lon), 3))
+    vertices[..., 0] = np.cos(lat)[:, None] * np.cos(lon)
+    vertices[..., 1] = np.cos(lat)[:, None] * np.sin(lon)
+    vertices[..., 2] = np.sin(lat)[:, None]
+    
+    # 每个四边形拆成两个三角形，按原有顺序交错排列
+    first = i[:-1, None] * (resolution * 2) + j[None, :]
+    second = first + resolution * 2
+    faces = np.stack([
+        np.stack([first, second, first + 1], axis=-1),
+        np.stack([second, second + 1, first + 1], axis=-1),
+    ], axis=-2)
+    
+    vertices = vertices.reshape(-1, 3)
+    faces = faces.reshape(-1, 3)
+    vertices.flags.writeable = False
+    faces.flags.writeable = False
+    return vertices, faces
+
 class PymatgenConverter:
     """基于pymatgen的CIF到OBJ转换器"""
     
@@ -99,12 +155,9 @@ class PymatgenConverter:
                  'Al', 'Ga', 'In', 'Tl', 'Sn', 'Pb', 'Bi'}
         
         # 统计每种元素的数量
-        element_counts = {}
-        for site in structure:
-            element = site.specie.symbol
-            element_counts[element] = element_counts.get(element, 0) + 1
+        element_counts = Counter(site.specie.symbol for site in structure)
         
-        logger.info(f"元素统计: {element_counts}")
+        logger.info(f"元素统计: {dict(element_counts)}")
         
         # 优先选择策略：
         # 1. 如果有金属元素，优先选择金属元素
@@ -125,12 +178,13 @@ class PymatgenConverter:
             return set(selected)
     
     def read_cif(self, cif_file: str) -> Structure:
-        """读取CIF文件"""
+        """
+        读取CIF文件
+        解析结果按(路径, 修改时间, 文件大小)缓存，同一文件重复转换时不再重新解析
+        """
         try:
-            parser = CifParser(cif_file)
-            # 使用parse_structures并设置primitive=False获取完整晶胞
-            structures = parser.parse_structures(primitive=False)
-            structure = structures[0]  # 获取第一个结构
+            # 返回副本，调用方修改结构不会污染缓存
+            structure = _parse_cif_cached(cif_file).copy()
             
             logger.info(f"成功读取CIF文件: {cif_file}")
             logger.info(f"原子数量: {len(structure)}")
@@ -143,29 +197,41 @@ class PymatgenConverter:
             logger.error(f"读取CIF文件失败: {e}")
             raise
     
-    def get_bonds(self, structure: Structure) -> List[Tuple[int, int, float]]:
-        """使用pymatgen的CrystalNN算法计算化学键"""
+    def get_all_neighbors(self, structure: Structure) -> List[Optional[List[Dict[str, Any]]]]:
+        """
+        使用CrystalNN一次计算所有原子的近邻信息
+        批量计算失败时退回逐个原子计算，计算失败的原子记为None
+        """
+        try:
+            return self.crystal_nn.get_all_nn_info(structure)
+        except Exception as e:
+            logger.warning(f"批量计算近邻失败，改为逐个原子计算: {e}")
+        
+        all_neighbors = []
+        for i in range(len(structure)):
+            try:
+                all_neighbors.append(self.crystal_nn.get_nn_info(structure, i))
+            except Exception as e:
+                logger.warning(f"计算原子{i}的近邻失败: {e}")
+                all_neighbors.append(None)
+        return all_neighbors
+    
+    def get_bonds(self, structure: Structure,
+                  all_neighbors: Optional[List[Optional[List[Dict[str, Any]]]]] = None) -> List[Tuple[int, int, float]]:
+        """
+        使用pymatgen的CrystalNN算法计算化学键
+        all_neighbors为get_all_neighbors的结果，传入时复用，避免重复计算近邻
+        """
         try:
-            # 使用CrystalNN算法识别化学键
-            nn = CrystalNN()
-            bonds = []
+            if all_neighbors is None:
+                all_neighbors = self.get_all_neighbors(structure)
             
-            for i, site in enumerate(structure):
-                try:
-                    # 获取近邻原子
-                    neighbors = nn.get_nn_info(structure, i)
-                    
-                    for neighbor in neighbors:
-                        j = neighbor['site_index']
-                        distance = neighbor['weight']  # 键长
-                        
-                        # 避免重复添加键（只添加i < j的键）
-                        if i < j:
-                            bonds.append((i, j, distance))
-                            
-                except Exception as e:
-                    logger.warning(f"计算原子{i}的近邻失败: {e}")
-                    continue
+            # 避免重复添加键（只添加i < j的键），weight为键长
+            bonds = [
+                (i, neighbor['site_index'], neighbor['weight'])
+                for i, neighbors in enumerate(all_neighbors) if neighbors
+                for neighbor in neighbors if i < neighbor['site_index']
+            ]
             
             logger.info(f"计算得到{len(bonds)}个化学键")
             return bonds
@@ -174,8 +240,12 @@ class PymatgenConverter:
             logger.error(f"计算化学键失败: {e}")
             return []
     
-    def analyze_coordination_environments(self, structure: Structure) -> Dict[str, Any]:
-        """分析配位环境和多面体"""
+    def analyze_coordination_environments(self, structure: Structure,
+                                          all_neighbors: Optional[List[Optional[List[Dict[str, Any]]]]] = None) -> Dict[str, Any]:
+        """
+        分析配位环境和多面体
+        all_neighbors为get_all_neighbors的结果，传入时复用，避免重复计算近邻
+        """
         try:
             logger.info(f"开始分析配位环境... 结构包含 {len(structure)} 个原子")
             logger.info(f"结构公式: {structure.formula}")
@@ -194,14 +264,19 @@ class PymatgenConverter:
             target_elements = self._select_polyhedra_elements(structure, elements)
             logger.info(f"选择显示多面体的元素: {target_elements}")
             
+            # 使用CrystalNN获取所有原子的邻居原子
+            if all_neighbors is None:
+                all_neighbors = self.get_all_neighbors(structure)
+            
             # 分析每个原子的配位环境
             logger.debug(f"开始分析 {len(structure)} 个原子的配位环境...")
             for i, site in enumerate(structure):
                 try:
                     logger.debug(f"分析原子 {i} ({site.specie.symbol})...")
                     
-                    # 使用CrystalNN获取邻居原子
-                    neighbors = self.crystal_nn.get_nn_info(structure, i)
+                    neighbors = all_neighbors[i]
+                    if neighbors is None:
+                        continue  # 近邻计算失败，已记录警告
                     
                     if not neighbors:
                         logger.warning(f"原子 {i} 没有找到邻居原子")
@@ -246,8 +321,8 @@ class PymatgenConverter:
                         
                 except Exception as e:
                     logger.warning(f"分析原子 {i} 的配位环境失败: {e}")
-                    import traceback
-                    logger.debug(f"详细错误信息: {traceback.format_exc()}")
+                    # 惰性记录堆栈：仅在启用DEBUG日志时才格式化traceback
+                    logger.opt(exception=True).debug("详细错误信息")
                     continue
             
             logger.info(f"配位环境分析完成，发现 {len(coordination_data['polyhedra'])} 个多面体")
@@ -281,107 +356,89 @@ class PymatgenConverter:
             return []
     
     def create_sphere(self, center: Tuple[float, float, float], 
-                     radius: float, resolution: int = 20) -> Tuple[List[Tuple[float, float, float]], List[Tuple[int, int, int]]]:
-        """创建球体的顶点和面"""
-        vertices = []
-        faces = []
-        
-        # 生成球体顶点
-        for i in range(resolution + 1):
-            lat = math.pi * (-0.5 + float(i) / resolution)
-            for j in range(resolution * 2):
-                lon = 2 * math.pi * float(j) / (resolution * 2)
-                
-                x = center[0] + radius * math.cos(lat) * math.cos(lon)
-                y = center[1] + radius * math.cos(lat) * math.sin(lon)
-                z = center[2] + radius * math.sin(lat)
-                
-                vertices.append((x, y, z))
-        
-        # 生成球体面
-        for i in range(resolution):
-            for j in range(resolution * 2):
-                first = i * (resolution * 2) + j
-                second = first + resolution * 2
-                
-                # 第一个三角形
-                faces.append((first, second, first + 1))
-                # 第二个三角形
-                faces.append((second, second + 1, first + 1))
-        
-        return vertices, faces
+                     radius: float, resolution: int = 20) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        创建球体的顶点和面
+        顶点为(N, 3)数组，按纬线逐圈、每圈按经线排列；面为(F, 3)的0起始索引数组（只读，所有原子共用）
+        """
+        unit_vertices, faces = _unit_sphere(resolution)
+        return unit_vertices * radius + np.asarray(center), faces
     
     def create_cylinder(self, start: Tuple[float, float, float], 
                        end: Tuple[float, float, float], 
-                       radius: float, resolution: int = 12) -> Tuple[List[Tuple[float, float, float]], List[Tuple[int, int, int]]]:
-        """创建圆柱体的顶点和面"""
-        vertices = []
-        faces = []
-        
+                       radius: float, resolution: int = 12) -> Tuple[np.ndarray, np.ndarray]:
+        """创建圆柱体的顶点和面，两端重合时返回空数组"""
+        vertices, faces = self.create_cylinders(np.asarray([start], dtype=float),
+                                                np.asarray([end], dtype=float),
+                                                radius, resolution)
+        if len(vertices) == 0:
+            return np.empty((0, 3)), np.empty((0, 3), dtype=int)
+        return vertices[0], faces
+    
+    def create_cylinders(self, starts: np.ndarray, ends: np.ndarray,
+                         radius: float, resolution: int = 12) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        批量创建圆柱体（用于化学键）
+        starts/ends为(B, 3)数组；返回(B', 2*resolution, 3)的顶点和每个圆柱共用的(2*resolution, 3)面索引
+        两端重合的圆柱被跳过，顶点按底面、顶面交替排列
+        """
         # 计算圆柱体方向向量
-        direction = np.array(end) - np.array(start)
-        length = np.linalg.norm(direction)
-        if length == 0:
-            return vertices, faces
-        
-        direction = direction / length
+        directions = ends - starts
+        lengths = np.linalg.norm(directions, axis=1)
+        valid = lengths != 0
+        starts, ends = starts[valid], ends[valid]
+        directions = directions[valid] / lengths[valid, None]
         
         # 找到垂直于方向向量的两个正交向量
-        if abs(direction[2]) < 0.9:
-            perpendicular1 = np.cross(direction, [0, 0, 1])
-        else:
-            perpendicular1 = np.cross(direction, [1, 0, 0])
-        
-        perpendicular1 = perpendicular1 / np.linalg.norm(perpendicular1)
-        perpendicular2 = np.cross(direction, perpendicular1)
+        reference = np.where(np.abs(directions[:, 2:3]) < 0.9, [0, 0, 1], [1, 0, 0])
+        perpendicular1 = np.cross(directions, reference)
+        perpendicular1 = perpendicular1 / np.linalg.norm(perpendicular1, axis=1, keepdims=True)
+        perpendicular2 = np.cross(directions, perpendicular1)
         
-        # 生成圆柱体顶点
-        for i in range(resolution):
-            angle = 2 * math.pi * i / resolution
-            offset = radius * (math.cos(angle) * perpendicular1 + math.sin(angle) * perpendicular2)
-            
-            # 底面顶点
-            bottom_vertex = np.array(start) + offset
-            vertices.append(tuple(bottom_vertex))
-            
-            # 顶面顶点
-            top_vertex = np.array(end) + offset
-            vertices.append(tuple(top_vertex))
+        # 生成圆柱体顶点：(B, resolution, 3)的偏移环分别加到两端
+        angles = 2 * np.pi * np.arange(resolution) / resolution
+        offsets = radius * (np.cos(angles)[None, :, None] * perpendicular1[:, None, :]
+                            + np.sin(angles)[None, :, None] * perpendicular2[:, None, :])
+        vertices = np.empty((len(starts), resolution, 2, 3))
+        vertices[:, :, 0] = starts[:, None, :] + offsets
+        vertices[:, :, 1] = ends[:, None, :] + offsets
         
-        # 生成圆柱体侧面
-        for i in range(resolution):
-            next_i = (i + 1) % resolution
-            
-            # 当前环的底面和顶面顶点索引
-            bottom_current = i * 2
-            top_current = i * 2 + 1
-            bottom_next = next_i * 2
-            top_next = next_i * 2 + 1
-            
-            # 侧面的两个三角形
-            faces.append((bottom_current, top_current, bottom_next))
-            faces.append((top_current, top_next, bottom_next))
+        # 生成圆柱体侧面：当前环与下一环的底面和顶面顶点组成两个三角形
+        bottom_current = np.arange(resolution) * 2
+        bottom_next = (np.arange(resolution) + 1) % resolution * 2
+        faces = np.stack([
+            np.stack([bottom_current, bottom_current + 1, bottom_next], axis=-1),
+            np.stack([bottom_current + 1, bottom_next + 1, bottom_next], axis=-1),
+        ], axis=-2)
         
-        return vertices, faces
+        return vertices.reshape(len(starts), resolution * 2, 3), faces.reshape(-1, 3)
     
     def convert_to_obj(self, structure: Structure, output_file: str, include_polyhedra: bool = True) -> bool:
         """将pymatgen Structure转换为OBJ文件"""
         try:
+            # 近邻信息只计算一次，化学键和配位环境分析共用
+            all_neighbors = self.get_all_neighbors(structure)
+            
             # 获取化学键
-            bonds = self.get_bonds(structure)
+            bonds = self.get_bonds(structure, all_neighbors)
             
             # 分析配位环境和多面体
             coordination_data = None
             if include_polyhedra:
-                coordination_data = self.analyze_coordination_environments(structure)
+                coordination_data = self.analyze_coordination_environments(structure, all_neighbors)
             
             vertices = []
             faces = []
             materials = []
             vertex_offset = 0
             
+            # 一次取出所有原子的元素符号和笛卡尔坐标，按元素分组（元素按字母顺序）
+            symbols = np.array([site.specie.symbol for site in structure])
+            cart_coords = structure.cart_coords
+            elements, element_index = np.unique(symbols, return_inverse=True)
+            elements = elements.tolist()
+            
             # 为每个元素创建材质
-            elements = set([site.specie.symbol for site in structure])
             for element in elements:
                 color = self.element_colors.get(element, (0.5, 0.5, 0.5))
                 materials.append(f"newmtl {element}\n")
@@ -412,44 +469,32 @@ class PymatgenConverter:
             with open(mtl_file, 'w', encoding='utf-8') as f:
                 f.writelines(materials)
             
-            # 开始写入OBJ文件
-            with open(output_file, 'w', encoding='utf-8') as f:
+            # 开始写入OBJ文件（顶点和面按块整体写出，避免逐行格式化）
+            with open(output_file, 'w', encoding='utf-8', buffering=1 << 20) as f:
                 f.write(f"# Pymatgen CIF to OBJ Converter\n")
                 f.write(f"# 原子数量: {len(structure)}\n")
                 f.write(f"# 化学键数量: {len(bonds)}\n")
                 f.write(f"mtllib {os.path.basename(mtl_file)}\n\n")
                 
-                # 按元素分组处理原子
-                for element in elements:
+                # 按元素分组处理原子：同一元素的所有球体一次缩放平移单位球得到
+                unit_vertices, sphere_faces = _unit_sphere(self.sphere_resolution)
+                for k, element in enumerate(elements):
                     f.write(f"# {element} 原子\n")
                     f.write(f"usemtl {element}\n")
                     
-                    element_faces = []
+                    # 获取原子半径
+                    radius = self.element_radii.get(element, 1.5) * 0.3  # 缩放因子
+                    element_coords = cart_coords[element_index == k]
+                    element_vertices = unit_vertices * radius + element_coords[:, None, :]
                     
-                    for i, site in enumerate(structure):
-                        if site.specie.symbol == element:
-                            # 获取原子半径
-                            radius = self.element_radii.get(element, 1.5) * 0.3  # 缩放因子
-                            
-                            # 创建球体
-                            sphere_vertices, sphere_faces = self.create_sphere(
-                                tuple(site.coords), radius, self.sphere_resolution
-                            )
-                            
-                            # 添加顶点
-                            for vertex in sphere_vertices:
-                                f.write(f"v {vertex[0]:.6f} {vertex[1]:.6f} {vertex[2]:.6f}\n")
-                            
-                            # 记录面（需要加上顶点偏移）
-                            for face in sphere_faces:
-                                adjusted_face = tuple(idx + vertex_offset + 1 for idx in face)
-                                element_faces.append(adjusted_face)
-                            
-                            vertex_offset += len(sphere_vertices)
+                    # 每个球体的面加上各自的顶点偏移
+                    sphere_offsets = vertex_offset + 1 + len(unit_vertices) * np.arange(len(element_coords))
+                    element_faces = sphere_faces[None, :, :] + sphere_offsets[:, None, None]
+                    vertex_offset += len(element_coords) * len(unit_vertices)
                     
-                    # 写入该元素的所有面
-                    for face in element_faces:
-                        f.write(f"f {face[0]} {face[1]} {face[2]}\n")
+                    # 先写该元素的所有顶点，再写所有面
+                    _write_obj_rows(f, element_vertices.reshape(-1, 3), OBJ_VERTEX_FORMAT)
+                    _write_obj_rows(f, element_faces.reshape(-1, 3), OBJ_FACE_FORMAT)
                     
                     f.write("\n")
                 
@@ -458,33 +503,22 @@ class PymatgenConverter:
                     f.write("# 化学键\n")
                     f.write("usemtl bond\n")
                     
-                    bond_faces = []
+                    # 一次生成所有化学键的圆柱体
+                    bond_pairs = np.array([(i, j) for i, j, distance in bonds])
+                    cylinder_vertices, cylinder_faces = self.create_cylinders(
+                        cart_coords[bond_pairs[:, 0]], cart_coords[bond_pairs[:, 1]],
+                        self.bond_radius, self.cylinder_resolution
+                    )
                     
-                    for bond in bonds:
-                        i, j, distance = bond
-                        start_pos = structure[i].coords
-                        end_pos = structure[j].coords
-                        
-                        # 创建圆柱体
-                        cylinder_vertices, cylinder_faces = self.create_cylinder(
-                            tuple(start_pos), tuple(end_pos), 
-                            self.bond_radius, self.cylinder_resolution
-                        )
-                        
-                        # 添加顶点
-                        for vertex in cylinder_vertices:
-                            f.write(f"v {vertex[0]:.6f} {vertex[1]:.6f} {vertex[2]:.6f}\n")
-                        
-                        # 记录面
-                        for face in cylinder_faces:
-                            adjusted_face = tuple(idx + vertex_offset + 1 for idx in face)
-                            bond_faces.append(adjusted_face)
-                        
-                        vertex_offset += len(cylinder_vertices)
+                    # 每个圆柱的面索引加上各自的顶点偏移
+                    vertices_per_cylinder = cylinder_vertices.shape[1]
+                    cylinder_offsets = vertex_offset + 1 + vertices_per_cylinder * np.arange(len(cylinder_vertices))
+                    bond_faces = cylinder_faces[None, :, :] + cylinder_offsets[:, None, None]
+                    vertex_offset += len(cylinder_vertices) * vertices_per_cylinder
                     
-                    # 写入化学键的所有面
-                    for face in bond_faces:
-                        f.write(f"f {face[0]} {face[1]} {face[2]}\n")
+                    # 写入化学键的所有顶点和面
+                    _write_obj_rows(f, cylinder_vertices.reshape(-1, 3), OBJ_VERTEX_FORMAT)
+                    _write_obj_rows(f, bond_faces.reshape(-1, 3), OBJ_FACE_FORMAT)
                 
                 # 处理配位多面体
                 if coordination_data and coordination_data['polyhedra']:
@@ -507,22 +541,19 @@ class PymatgenConverter:
                             if faces:
                                 # 添加配位原子的顶点
                                 polyhedron_vertex_start = vertex_offset
-                                for coord in neighbor_coords:
-                                    f.write(f"v {coord[0]:.6f} {coord[1]:.6f} {coord[2]:.6f}\n")
-                                    vertex_offset += 1
+                                _write_obj_rows(f, np.asarray(neighbor_coords, dtype=float), OBJ_VERTEX_FORMAT)
+                                vertex_offset += len(neighbor_coords)
                                 
                                 # 记录多面体的面
-                                for face in faces:
-                                    adjusted_face = tuple(idx + polyhedron_vertex_start + 1 for idx in face)
-                                    polyhedron_faces.append(adjusted_face)
+                                polyhedron_faces.append(np.asarray(faces) + (polyhedron_vertex_start + 1))
                                     
                         except Exception as e:
                             logger.warning(f"生成多面体失败: {e}")
                             continue
                     
                     # 写入多面体的所有面
-                    for face in polyhedron_faces:
-                        f.write(f"f {face[0]} {face[1]} {face[2]}\n")
+                    if polyhedron_faces:
+                        _write_obj_rows(f, np.concatenate(polyhedron_faces), OBJ_FACE_FORMAT)
                     
                     logger.info(f"多面体数量: {len(coordination_data['polyhedra'])}")
             
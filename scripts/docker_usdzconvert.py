@@ -10,14 +10,25 @@ import subprocess
 import tempfile
 import shutil
 from pathlib import Path
-from typing import Optional, List, Dict, Tuple
+from typing import Optional, List, Dict, Set, Tuple
 import json
 import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import repeat
 from loguru import logger
 
+# 批量转换的默认并发上限：docker守护进程在其socket上串行处理请求，
+# 过多的并发docker run只会排队，还会占用更多内存
+MAX_DOCKER_WORKERS = 8
+
 class DockerUsdzConverter:
     """Docker USDZ转换器 - 可选增强功能"""
     
+    # 已确认可用的(docker可执行文件, 镜像名)
+    # 探测需要启动多个docker子进程，同一进程内多次创建转换器时只探测一次；
+    # 只缓存可用的结果，用户按提示启动Docker后，新建的转换器会重新探测
+    _available_keys: Set[Tuple[str, str]] = set()
+    
     def __init__(self, docker_image="michaelgold/usdzconvert:0.66-usd-22.05b"):
         """
         初始化Docker USDZ转换器
@@ -26,7 +37,23 @@ class DockerUsdzConverter:
             docker_image: Docker镜像名称
         """
         self.docker_image = docker_image
-        self.is_available = self._check_availability()
+        # 预先解析docker可执行文件的绝对路径：省去每次调用的PATH查找，
+        # 也是CPython在Linux/macOS上走posix_spawn快速路径的前提条件
+        self.docker_executable = shutil.which("docker") or "docker"
+        cache_key = (self.docker_executable, docker_image)
+        self.is_available = cache_key in self._available_keys or self._check_availability()
+        if self.is_available:
+            self._available_keys.add(cache_key)
+        
+    def _run_docker(self, args: List[str], **kwargs) -> subprocess.CompletedProcess:
+        """
+        执行docker命令
+        
+        服务进程加载了pymatgen等大型依赖后，fork需要复制大量页表；
+        使用绝对路径并保持close_fds=False（Python默认文件描述符不可继承），
+        使subprocess可以改用posix_spawn，避免复制父进程地址空间
+        """
+        return subprocess.run([self.docker_executable, *args], close_fds=False, **kwargs)
         
     def _check_availability(self) -> bool:
         """检查Docker和镜像可用性"""
@@ -36,12 +63,12 @@ class DockerUsdzConverter:
         """检查Docker是否可用"""
         try:
             # 检查Docker守护进程
-            result = subprocess.run(["docker", "--version"], 
+            result = self._run_docker(["--version"], 
                                   capture_output=True, text=True, check=True, timeout=10)
             logger.info(f"✓ Docker可用: {result.stdout.strip()}")
             
             # 检查Docker守护进程是否运行
-            result = subprocess.run(["docker", "info"], 
+            result = self._run_docker(["info"], 
                                   capture_output=True, text=True, timeout=10)
             if result.returncode != 0:
                 logger.warning("Docker守护进程未运行，请启动Docker Desktop")
@@ -78,8 +105,8 @@ class DockerUsdzConverter:
     def _check_image_exists(self) -> bool:
         """检查Docker镜像是否存在"""
         try:
-            result = subprocess.run([
-                "docker", "images", "--format", "{{.Repository}}:{{.Tag}}"
+            result = self._run_docker([
+                "images", "--format", "{{.Repository}}:{{.Tag}}"
             ], capture_output=True, text=True, check=True, timeout=15)
             
             images = result.stdout.strip().split('\n')
@@ -95,8 +122,8 @@ class DockerUsdzConverter:
             logger.info("这可能需要几分钟时间，请耐心等待...")
             
             # 拉取镜像
-            result = subprocess.run([
-                "docker", "pull", self.docker_image
+            result = self._run_docker([
+                "pull", self.docker_image
             ], capture_output=True, text=True, timeout=600)  # 10分钟超时
             
             if result.returncode == 0:
@@ -150,7 +177,7 @@ class DockerUsdzConverter:
             
             # 构建Docker命令
             docker_cmd = [
-                "docker", "run", "--rm",
+                "run", "--rm",
                 "-v", f"{temp_path}:/workspace",
                 "-w", "/workspace",
                 self.docker_image,
@@ -158,7 +185,7 @@ class DockerUsdzConverter:
             ]
             
             # 执行转换
-            result = subprocess.run(docker_cmd, 
+            result = self._run_docker(docker_cmd, 
                                   capture_output=True, text=True, timeout=300)
             
             if result.returncode == 0:
@@ -197,55 +224,75 @@ class DockerUsdzConverter:
                 shutil.copy2(mtl_file, temp_path / mtl_file.name)
                 logger.debug(f"已复制MTL文件: {mtl_file.name}")
             
-            # 复制纹理文件
-            texture_extensions = ['.png', '.jpg', '.jpeg', '.tga', '.bmp', '.tiff']
-            for ext in texture_extensions:
-                texture_files = list(obj_file.parent.glob(f"*{ext}"))
-                for texture_file in texture_files:
-                    shutil.copy2(texture_file, temp_path / texture_file.name)
-                    logger.debug(f"已复制纹理文件: {texture_file.name}")
+            # 复制纹理文件：一次os.scandir遍历目录，按扩展名筛选，DirEntry自带文件类型信息
+            texture_extensions = ('.png', '.jpg', '.jpeg', '.tga', '.bmp', '.tiff')
+            with os.scandir(obj_file.parent) as entries:
+                for entry in entries:
+                    if (entry.name.endswith(texture_extensions) and not entry.name.startswith('.')
+                            and entry.is_file()):
+                        shutil.copy2(entry.path, temp_path / entry.name)
+                        logger.debug(f"已复制纹理文件: {entry.name}")
                     
         except Exception as e:
             logger.warning(f"复制相关文件时出错: {e}")
     
-    def batch_convert(self, obj_files: List[str], output_dir: Optional[str] = None) -> List[Dict]:
-        """批量转换OBJ文件"""
+    def batch_convert(self, obj_files: List[str], output_dir: Optional[str] = None,
+                      max_workers: Optional[int] = None) -> List[Dict]:
+        """
+        批量转换OBJ文件
+        
+        每个文件在独立的容器和临时目录中转换，耗时主要是容器启动和外部进程，
+        因此用线程池并发提交以重叠等待时间；结果顺序与输入一致
+        
+        Args:
+            obj_files: OBJ文件路径列表
+            output_dir: 输出目录（可选，默认与输入文件同目录）
+            max_workers: 并发转换数（可选，默认为CPU核数，且不超过MAX_DOCKER_WORKERS）
+        """
         if not self.is_available:
             return [{"error": "Docker USD转换器不可用"}]
             
+        output_path = None
         if output_dir:
             output_path = Path(output_dir)
             output_path.mkdir(parents=True, exist_ok=True)
         
-        results = []
-        success_count = 0
-        
         logger.info(f"开始Docker批量转换 {len(obj_files)} 个文件")
         
-        for i, obj_file in enumerate(obj_files, 1):
-            logger.info(f"[{i}/{len(obj_files)}] 处理文件: {obj_file}")
-            
-            obj_path = Path(obj_file)
-            if output_dir:
-                output_file = output_path / obj_path.with_suffix('.usdz').name
-            else:
-                output_file = obj_path.with_suffix('.usdz')
-            
-            success, message = self.convert_obj_to_usdz(str(obj_path), str(output_file))
-            
-            if success:
-                success_count += 1
-            
-            results.append({
-                'input': str(obj_file),
-                'output': str(output_file) if success else None,
-                'success': success,
-                'message': message
-            })
+        workers = max_workers or min(len(obj_files), os.cpu_count() or 1, MAX_DOCKER_WORKERS)
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            results = list(executor.map(
+                self._convert_batch_item,
+                range(1, len(obj_files) + 1),
+                repeat(len(obj_files)),
+                obj_files,
+                repeat(output_path)
+            ))
         
+        success_count = sum(1 for result in results if result['success'])
         logger.info(f"Docker批量转换完成: {success_count}/{len(obj_files)} 个文件成功")
         return results
     
+    def _convert_batch_item(self, index: int, total: int, obj_file: str,
+                            output_path: Optional[Path]) -> Dict:
+        """转换批量任务中的单个文件"""
+        logger.info(f"[{index}/{total}] 处理文件: {obj_file}")
+        
+        obj_path = Path(obj_file)
+        if output_path:
+            output_file = output_path / obj_path.with_suffix('.usdz').name
+        else:
+            output_file = obj_path.with_suffix('.usdz')
+        
+        success, message = self.convert_obj_to_usdz(str(obj_path), str(output_file))
+        
+        return {
+            'input': str(obj_file),
+            'output': str(output_file) if success else None,
+            'success': success,
+            'message': message
+        }
+    
     def get_info(self) -> Dict[str, any]:
         """获取转换器信息"""
         return {
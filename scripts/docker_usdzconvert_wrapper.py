@@ -12,6 +12,13 @@ import time
 from pathlib import Path
 import argparse
 
+# 可选：requests-toolbelt可以边读文件边发送multipart请求体
+try:
+    from requests_toolbelt.multipart.encoder import MultipartEncoder
+    TOOLBELT_AVAILABLE = True
+except ImportError:
+    TOOLBELT_AVAILABLE = False
+
 class USdzConvertWrapper:
     def __init__(self, webui_url="http://192.168.2.219:80"):
         self.webui_url = webui_url
@@ -37,7 +44,7 @@ class USdzConvertWrapper:
             
             # 准备上传文件
             with open(input_file, 'rb') as f:
-                files = {'file': (os.path.basename(input_file), f, 'application/octet-stream')}
+                file_field = (os.path.basename(input_file), f, 'application/octet-stream')
                 
                 # 准备转换参数
                 data = {
@@ -50,12 +57,22 @@ class USdzConvertWrapper:
                     print("Converting in iOS12 compatibility mode.")
                 
                 # 发送转换请求
-                response = self.session.post(
-                    f"{self.webui_url}/convert",
-                    files=files,
-                    data=data,
-                    timeout=300  # 5分钟超时
-                )
+                if TOOLBELT_AVAILABLE:
+                    # 流式上传：请求体按需从文件读取，不在内存中拼出整个multipart body
+                    encoder = MultipartEncoder(fields={**data, 'file': file_field})
+                    response = self.session.post(
+                        f"{self.webui_url}/convert",
+                        data=encoder,
+                        headers={'Content-Type': encoder.content_type},
+                        timeout=300  # 5分钟超时
+                    )
+                else:
+                    response = self.session.post(
+                        f"{self.webui_url}/convert",
+                        files={'file': file_field},
+                        data=data,
+                        timeout=300  # 5分钟超时
+                    )
                 
                 if response.status_code == 200:
                     # 保存转换结果
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+API路由测试
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("fastapi")
+from fastapi.testclient import TestClient
+
+# 添加项目根目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from api import routes
+
+
+def test_session_info_etag(monkeypatch):
+    """会话信息带ETag，If-None-Match命中时返回304"""
+    monkeypatch.setattr(routes.output_manager, "get_session_info",
+                        lambda session_id: {"session_id": session_id, "status": "completed"})
+    client = TestClient(routes.app)
+
+    response = client.get("/api/sessions/abc")
+    assert response.status_code == 200
+    assert response.json()["data"]["status"] == "completed"
+    etag = response.headers["ETag"]
+
+    # 原样回传ETag
+    response = client.get("/api/sessions/abc", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["ETag"] == etag
+
+    # 代理常见的弱校验前缀和多值列表
+    response = client.get("/api/sessions/abc", headers={"If-None-Match": f'"other", W/{etag}'})
+    assert response.status_code == 304
+
+    # 不匹配时返回完整内容
+    response = client.get("/api/sessions/abc", headers={"If-None-Match": '"other"'})
+    assert response.status_code == 200
+    assert response.headers["ETag"] == etag
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TinyUSDZ转换器OBJ解析测试
+"""
+
+import sys
+from pathlib import Path
+
+# 添加项目根目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from converter.tinyusdz_converter import TinyUSDZConverter, _parse_obj_cached
+
+
+def test_parse_obj_dispatches_on_first_token(tmp_path):
+    """缩进行、制表符分隔的行都能识别，以us开头的其他关键字不当作usemtl"""
+    obj_path = tmp_path / "mesh.obj"
+    obj_path.write_bytes(
+        b"# comment\r\n"
+        b"v 0 0 0\r\n"
+        b"  v\t1 0 0\r\n"
+        b"\tv 1 1 0\n"
+        b"v 0 1 0\n"
+        b"usefoo bar\n"
+        b"usemtl Na_MAT\n"
+        b"\tf\t1/1/1 2/2/2 3/3/3 4/4/4\n"
+    )
+    geometry = TinyUSDZConverter()._parse_obj_file(str(obj_path))
+    assert geometry['vertex_count'] == 4
+    assert geometry['vertices'].tolist() == [[0, 0, 0], [1, 0, 0], [1, 1, 0], [0, 1, 0]]
+    assert geometry['faces'] == ((0, 1, 2, 3),)
+    assert geometry['materials'] == ('Na_MAT',)
+
+
+def test_parse_obj_failure_is_not_cached(tmp_path):
+    """解析失败时返回空几何信息，且不把不完整的结果写入缓存"""
+    obj_path = tmp_path / "broken.obj"
+    obj_path.write_bytes(b"v 0 0 0\nv 1 x 0\n")
+    cached = _parse_obj_cached.cache_info().currsize
+    geometry = TinyUSDZConverter()._parse_obj_file(str(obj_path))
+    assert geometry['vertex_count'] == 0
+    assert geometry['faces'] == ()
+    assert _parse_obj_cached.cache_info().currsize == cached
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+USDZ转换器几何处理测试
+"""
+
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# 添加项目根目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from converter import usdz_converter
+from converter.usdz_converter import USDZConverter, triangulate_fan
+
+# 法线计算的两条路径：Numba内核和纯NumPy
+NORMAL_PATHS = [
+    pytest.param(True, id="numba", marks=pytest.mark.skipif(
+        not usdz_converter.NUMBA_AVAILABLE, reason="numba未安装")),
+    pytest.param(False, id="numpy"),
+]
+
+
+def _fan_triangles(face_vertex_counts, face_vertex_indices):
+    """逐面循环的扇形三角化，作为向量化实现的对照"""
+    triangles = []
+    start = 0
+    for count in face_vertex_counts:
+        for i in range(1, count - 1):
+            triangles += [face_vertex_indices[start], face_vertex_indices[start + i],
+                          face_vertex_indices[start + i + 1]]
+        start += count
+    return triangles
+
+
+@pytest.mark.parametrize("use_numba", NORMAL_PATHS)
+def test_compute_vertex_normals_rejects_out_of_range_index(monkeypatch, use_numba):
+    """面索引越界时两条路径都抛出ValueError，不进入内核"""
+    monkeypatch.setattr(usdz_converter, "NUMBA_AVAILABLE", use_numba)
+    vertices = np.array([[0, 0, 0], [1, 0, 0], [0, 1, 0]], dtype=np.float64)
+    counts = np.array([3], dtype=np.int32)
+    converter = USDZConverter()
+
+    with pytest.raises(ValueError):
+        converter._compute_vertex_normals(vertices, counts, np.array([0, 1, 3], dtype=np.int32))
+    with pytest.raises(ValueError):
+        converter._compute_vertex_normals(vertices, counts, np.array([0, -1, 2], dtype=np.int32))
+    # 面顶点数之和与索引数不一致
+    with pytest.raises(ValueError):
+        converter._compute_vertex_normals(vertices, np.array([3, 3], dtype=np.int32),
+                                          np.array([0, 1, 2], dtype=np.int32))
+
+
+def test_load_materials_sees_in_place_rewrite(tmp_path):
+    """MTL被原地改写且大小、修改时间不变时，不返回改写前的颜色"""
+    mtl_path = tmp_path / "mesh.mtl"
+    mtl_path.write_bytes(b"newmtl Na_MAT\nKd 0.1 0.2 0.3\n")
+    stat = mtl_path.stat()
+    converter = USDZConverter()
+    assert converter._load_materials(str(mtl_path)) == {"Na_MAT": (0.1, 0.2, 0.3)}
+
+    mtl_path.write_bytes(b"newmtl Na_MAT\nKd 0.7 0.8 0.9\n")
+    os.utime(mtl_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert converter._load_materials(str(mtl_path)) == {"Na_MAT": (0.7, 0.8, 0.9)}
+
+
+def test_parse_obj_file_faces_and_materials(tmp_path):
+    """CRLF换行、行首缩进、制表符、v/vt/vn引用、带w分量的顶点、多边形面和usemtl分段"""
+    obj_path = tmp_path / "mesh.obj"
+    obj_path.write_bytes(
+        b"# comment\r\n"
+        b"mtllib mesh.mtl\r\n"
+        b"v 0 0 0\r\n"
+        b"  v 1 0 0\r\n"
+        b"v\t1 1 0\r\n"
+        b"v 0 1 0\r\n"
+        b"v 2 0 0 1.0\r\n"
+        b"vt 0 0\r\n"
+        b"vn 0 0 1\r\n"
+        b"usemtl A\r\n"
+        b"f 1/1/1 2/1/1 3/1/1 4/1/1\r\n"
+        b"  f 2//1 5//1 3//1\r\n"
+        b"usemtl B\r\n"
+        b"f\t1 2 5\r\n"
+        b"f 1 2\r\n"
+        b"usemtl A\r\n"
+        b"f 4 3 5 1 2\r\n"
+    )
+    mesh = USDZConverter()._parse_obj_file(str(obj_path))
+
+    assert mesh.vertices.tolist() == [[0, 0, 0], [1, 0, 0], [1, 1, 0], [0, 1, 0], [2, 0, 0]]
+    # 少于3个顶点的面被丢弃
+    assert mesh.face_vertex_counts.tolist() == [4, 3, 3, 5]
+    assert mesh.face_vertex_indices.tolist() == [0, 1, 2, 3, 1, 4, 2, 0, 1, 4, 3, 2, 4, 0, 1]
+    assert mesh.face_material_ids.tolist() == [0, 0, 1, 0]
+    assert mesh.material_names == ["A", "B"]
+    assert mesh.face_vertex_counts.dtype == np.int32
+    assert mesh.face_vertex_indices.dtype == np.int32
+
+
+def test_triangulate_fan_matches_loop():
+    """三角形、四边形和多边形混合时与逐面循环结果一致，保持面的原始顺序"""
+    counts = np.array([3, 4, 6, 3, 5], dtype=np.int32)
+    indices = np.random.default_rng(0).integers(0, 50, counts.sum()).astype(np.int32)
+    triangles = triangulate_fan(counts, indices)
+    assert triangles.tolist() == _fan_triangles(counts.tolist(), indices.tolist())
+    # 四边形沿v0-v2分割
+    assert triangulate_fan(np.array([4], dtype=np.int32),
+                           np.array([7, 8, 9, 10], dtype=np.int32)).tolist() == [7, 8, 9, 7, 9, 10]
+    assert triangulate_fan(np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int32)).size == 0
+
+
+def test_parse_obj_file_merges_duplicate_vertices(tmp_path):
+    """坐标相同的顶点合并为首次出现的那个，面索引随之重映射"""
+    obj_path = tmp_path / "mesh.obj"
+    obj_path.write_bytes(
+        b"v 0 0 0\r\nv 1 0 0\r\nv 1 1 0\r\nv 0 1 0\r\n"
+        b"v 1 0 0\r\nv 2 0 0\r\nv 2 1 0\r\nv 1 1 0\r\n"
+        b"f 1 2 3 4\r\n"
+        b"  f 5 6 7 8\r\n"
+    )
+    mesh = USDZConverter()._parse_obj_file(str(obj_path))
+
+    assert mesh.vertices.tolist() == [[0, 0, 0], [1, 0, 0], [1, 1, 0], [0, 1, 0], [2, 0, 0], [2, 1, 0]]
+    assert mesh.face_vertex_counts.tolist() == [4, 4]
+    assert mesh.face_vertex_indices.tolist() == [0, 1, 2, 3, 1, 4, 5, 2]
+
+
+def test_deduplicate_vertices_keeps_out_of_range_indices():
+    """面索引越界时不做合并，原样返回"""
+    vertices = np.array([[0, 0, 0], [0, 0, 0], [1, 0, 0]], dtype=np.float64)
+    indices = np.array([0, 1, 3], dtype=np.int32)
+    merged, remapped = USDZConverter()._deduplicate_vertices(vertices, indices)
+    assert merged is vertices
+    assert remapped is indices
+
+
+@pytest.mark.parametrize("use_numba", NORMAL_PATHS)
+def test_compute_vertex_normals_matches_loop(monkeypatch, use_numba):
+    """Numba和NumPy两条路径都与逐三角形累加面积加权法线的结果一致"""
+    monkeypatch.setattr(usdz_converter, "NUMBA_AVAILABLE", use_numba)
+    rng = np.random.default_rng(1)
+    # 最后一个顶点不属于任何面
+    vertices = rng.random((21, 3))
+    counts = np.array([3, 4, 5, 3, 6, 4], dtype=np.int32)
+    indices = rng.integers(0, 20, counts.sum()).astype(np.int32)
+
+    expected = np.zeros_like(vertices)
+    for a, b, c in np.reshape(_fan_triangles(counts.tolist(), indices.tolist()), (-1, 3)):
+        normal = np.cross(vertices[b] - vertices[a], vertices[c] - vertices[a])
+        expected[[a, b, c]] += normal
+    lengths = np.linalg.norm(expected, axis=1)
+    expected[lengths < 1e-12] = (0.0, 1.0, 0.0)
+    expected /= np.linalg.norm(expected, axis=1, keepdims=True)
+
+    normals = USDZConverter()._compute_vertex_normals(vertices, counts, indices)
+    assert normals.dtype == np.float32
+    assert normals.shape == vertices.shape
+    np.testing.assert_allclose(normals, expected, atol=1e-5)
+    assert normals[-1].tolist() == [0.0, 1.0, 0.0]
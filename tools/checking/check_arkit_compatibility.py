@@ -4,9 +4,13 @@
 检查USDZ文件是否符合Apple ARKit要求
 """
 
+import contextlib
+import io
+import json
 import os
 import sys
 import zipfile
+from functools import wraps
 from pathlib import Path
 
 try:
@@ -16,24 +20,46 @@ except ImportError:
     USD_AVAILABLE = False
     print("⚠️ USD Python绑定不可用")
 
-def check_arkit_compatibility(usdz_path: str):
+def buffered(func):
+    """
+    将函数内的print输出先写入内存缓冲区，结束后一次性写到stdout
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        buffer = io.StringIO()
+        try:
+            with contextlib.redirect_stdout(buffer):
+                return func(*args, **kwargs)
+        finally:
+            sys.stdout.write(buffer.getvalue())
+            sys.stdout.flush()
+    return wrapper
+
+@buffered
+def check_arkit_compatibility(usdz_path: str, report: dict = None):
     """
     检查USDZ文件是否符合Apple ARKit要求
+    
+    report: 可选字典，填入检查出的问题和警告列表，供JSON输出使用
     """
+    issues = []
+    warnings = []
+    if report is not None:
+        report.update(file=usdz_path, issues=issues, warnings=warnings)
+    
     if not USD_AVAILABLE:
         print("❌ 无法检查，USD Python绑定不可用")
+        issues.append("USD Python绑定不可用")
         return False
     
     if not os.path.exists(usdz_path):
         print(f"❌ 文件不存在: {usdz_path}")
+        issues.append(f"文件不存在: {usdz_path}")
         return False
     
     print(f"🍎 ARKit兼容性检查: {usdz_path}")
     print("=" * 60)
     
-    issues = []
-    warnings = []
-    
     try:
         # 1. 检查文件格式和结构
         print("📦 检查USDZ包结构...")
@@ -156,8 +182,11 @@ def check_geometry(stage) -> list:
     issues = []
     mesh_count = 0
     
-    for prim in stage.Traverse():
+    prim_range = iter(stage.Traverse())
+    for prim in prim_range:
         if prim.IsA(UsdGeom.Mesh):
+            # 网格下只有GeomSubset等子Prim，不再深入遍历
+            prim_range.PruneChildren()
             mesh_count += 1
             mesh = UsdGeom.Mesh(prim)
             
@@ -189,8 +218,11 @@ def check_materials(stage) -> tuple:
     warnings = []
     material_count = 0
     
-    for prim in stage.Traverse():
+    prim_range = iter(stage.Traverse())
+    for prim in prim_range:
         if prim.IsA(UsdShade.Material):
+            # 材质下只有着色器节点，不再深入遍历
+            prim_range.PruneChildren()
             material_count += 1
             material = UsdShade.Material(prim)
             
@@ -269,11 +301,22 @@ def check_file_size(usdz_path: str) -> list:
     return warnings
 
 def main():
-    if len(sys.argv) < 2:
-        print("用法: python check_arkit_compatibility.py <usdz_file>")
+    args = [arg for arg in sys.argv[1:] if arg != '--json']
+    if not args:
+        print("用法: python check_arkit_compatibility.py <usdz_file> [--json]")
         sys.exit(1)
     
-    usdz_file = sys.argv[1]
+    usdz_file = args[0]
+    
+    # --json: 不输出逐项的检查过程，只输出一次机器可读的结果
+    if '--json' in sys.argv[1:]:
+        report = {}
+        with contextlib.redirect_stdout(io.StringIO()):
+            success = check_arkit_compatibility(usdz_file, report)
+        report['compatible'] = success
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+        sys.exit(0 if success else 1)
+    
     success = check_arkit_compatibility(usdz_file)
     
     if success:
@@ -2,31 +2,50 @@
 """
 检查USDZ文件内容
 """
+import io
 import zipfile
 import os
 
+# 每个USD文件预览的字符数
+PREVIEW_CHARS = 800
+
+# 二进制USD（crate）文件头
+USDC_MAGIC = b'PXR-USDC'
+
 def check_usdz_file(usdz_file):
-    if not os.path.exists(usdz_file):
+    try:
+        file_size = os.stat(usdz_file).st_size
+    except OSError:
         print(f"❌ 文件不存在: {usdz_file}")
         return
     
     print(f"📁 USDZ文件信息: {usdz_file}")
-    print(f"📏 文件大小: {os.path.getsize(usdz_file)} 字节")
+    print(f"📏 文件大小: {file_size} 字节")
     
     try:
         with zipfile.ZipFile(usdz_file, 'r') as z:
             print("\n📦 压缩包内容:")
-            for info in z.infolist():
+            file_infos = z.infolist()
+            for info in file_infos:
                 print(f"  📄 {info.filename}: {info.file_size} 字节")
             
-            # 检查USD文件内容
-            usd_files = [f for f in z.namelist() if f.endswith('.usd') or f.endswith('.usda')]
+            # 检查USD文件内容：直接使用ZipInfo，无需再按文件名查找
+            usd_infos = [info for info in file_infos if info.filename.endswith(('.usd', '.usda'))]
             
-            for usd_file in usd_files[:2]:  # 只检查前2个USD文件
-                print(f"\n=== {usd_file} 内容预览 ===")
+            for usd_info in usd_infos[:2]:  # 只检查前2个USD文件
+                print(f"\n=== {usd_info.filename} 内容预览 ===")
                 try:
-                    content = z.read(usd_file).decode('utf-8')
-                    print(content[:800] + ("..." if len(content) > 800 else ""))
+                    with z.open(usd_info) as usd_stream:
+                        # 先窥视文件头：二进制crate无法文本预览，只报告格式和大小
+                        if usd_stream.peek(len(USDC_MAGIC))[:len(USDC_MAGIC)] == USDC_MAGIC:
+                            print(f"二进制USDC格式，{usd_info.file_size} 字节，跳过文本预览")
+                            continue
+                        
+                        # 流式解码，只读取预览所需的字符（多读1个用于判断是否截断），
+                        # 不再把整个条目解压后再整体decode
+                        with io.TextIOWrapper(usd_stream, encoding='utf-8') as text:
+                            content = text.read(PREVIEW_CHARS + 1)
+                    print(content[:PREVIEW_CHARS] + ("..." if len(content) > PREVIEW_CHARS else ""))
                 except Exception as e:
                     print(f"❌ 读取失败: {e}")
                     
@@ -21,17 +21,17 @@ def compare_usdz_files():
     cube_file = "test_cube.usdz"
     licoo2_file = "conversion_results/20250826_145028_d526916f/final_LiCoO2.usdz"
     
-    if os.path.exists(cube_file):
-        cube_size = os.path.getsize(cube_file)
+    try:
+        cube_size = os.stat(cube_file).st_size
         print(f"  📄 测试立方体: {cube_size:,} 字节")
-    else:
+    except OSError:
         print(f"  ❌ 测试立方体文件不存在")
         return
     
-    if os.path.exists(licoo2_file):
-        licoo2_size = os.path.getsize(licoo2_file)
+    try:
+        licoo2_size = os.stat(licoo2_file).st_size
         print(f"  📄 LiCoO2文件: {licoo2_size:,} 字节")
-    else:
+    except OSError:
         print(f"  ❌ LiCoO2文件不存在")
         return
     
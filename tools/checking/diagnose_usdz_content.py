@@ -4,19 +4,24 @@ USDZ内容详细诊断工具
 用于深入分析USDZ文件的内容和结构，帮助诊断显示问题
 """
 
+import contextlib
 import zipfile
 import tempfile
 import os
 from pathlib import Path
 import sys
+import numpy as np
 
 try:
-    from pxr import Usd, UsdGeom, UsdShade, Sdf, Gf
+    from pxr import Usd, UsdGeom, UsdShade, Sdf
 except ImportError:
     print("❌ 错误: 需要安装USD Python库")
     print("请运行: pip install usd-core")
     sys.exit(1)
 
+# 最多列出的不可见Prim路径数，其余只计数
+INVISIBLE_PRIM_PREVIEW = 20
+
 def diagnose_usdz_content(usdz_path):
     """
     详细诊断USDZ文件内容
@@ -29,40 +34,43 @@ def diagnose_usdz_content(usdz_path):
         return False
     
     # 检查USDZ包结构
+    # USD可直接打开USDZ包，只有直接打开失败时才解压到临时目录
     print("📦 检查USDZ包结构...")
-    try:
-        with zipfile.ZipFile(usdz_path, 'r') as zip_file:
-            file_list = zip_file.namelist()
-            print(f"  📁 包含 {len(file_list)} 个文件:")
-            for file_name in file_list:
-                file_info = zip_file.getinfo(file_name)
-                print(f"    📄 {file_name} ({file_info.file_size} 字节)")
-    except Exception as e:
-        print(f"❌ 无法读取USDZ包: {e}")
-        return False
-    
-    # 提取并分析USD文件
-    with tempfile.TemporaryDirectory() as temp_dir:
+    with contextlib.ExitStack() as stack:
         try:
             with zipfile.ZipFile(usdz_path, 'r') as zip_file:
-                zip_file.extractall(temp_dir)
-            
-            # 查找USD文件
-            usd_files = []
-            for root, dirs, files in os.walk(temp_dir):
-                for file in files:
-                    if file.endswith(('.usd', '.usda', '.usdc')):
-                        usd_files.append(os.path.join(root, file))
-            
+                file_infos = zip_file.infolist()
+                print(f"  📁 包含 {len(file_infos)} 个文件:")
+                
+                # 单次遍历ZipInfo：打印条目并按包内顺序收集USD文件，无需解压后再遍历临时目录
+                usd_files = []
+                for file_info in file_infos:
+                    print(f"    📄 {file_info.filename} ({file_info.file_size} 字节)")
+                    if file_info.filename.endswith(('.usd', '.usda', '.usdc')):
+                        usd_files.append(file_info.filename)
+        except Exception as e:
+            print(f"❌ 无法读取USDZ包: {e}")
+            return False
+        
+        # 分析USD文件
+        try:
             if not usd_files:
                 print("❌ 未找到USD文件")
                 return False
             
-            # 分析主USD文件
-            main_usd = usd_files[0]
-            print(f"\n🎬 分析USD文件: {os.path.basename(main_usd)}")
+            # 分析主USD文件（USDZ包的根层即包内第一个USD文件）
+            print(f"\n🎬 分析USD文件: {os.path.basename(usd_files[0])}")
             
-            stage = Usd.Stage.Open(main_usd)
+            try:
+                stage = Usd.Stage.Open(usdz_path)
+            except Exception:
+                stage = None
+            if not stage:
+                # 回退：解压后打开主USD文件，临时目录在分析结束后清理
+                temp_dir = stack.enter_context(tempfile.TemporaryDirectory())
+                with zipfile.ZipFile(usdz_path, 'r') as zip_file:
+                    zip_file.extractall(temp_dir)
+                stage = Usd.Stage.Open(os.path.join(temp_dir, usd_files[0]))
             if not stage:
                 print("❌ 无法打开USD文件")
                 return False
@@ -80,7 +88,26 @@ def diagnose_usdz_content(usdz_path):
             
             # 检查所有Prim
             print("\n🔷 Prim层次结构:")
-            _print_prim_hierarchy(stage.GetPseudoRoot(), 0)
+            # 缓存各网格的顶点数组，几何体详情中复用，避免重复反序列化
+            points_cache = {}
+            _print_prim_hierarchy(stage.GetPseudoRoot(), 0, points_cache)
+            
+            # 单次遍历Stage，按类型收集网格、材质和不可见的Prim
+            mesh_prims = []
+            material_prims = []
+            invisible_prims = []
+            invisible_count = 0
+            for prim in stage.Traverse():
+                if prim.IsA(UsdGeom.Mesh):
+                    mesh_prims.append(prim)
+                elif prim.IsA(UsdShade.Material):
+                    material_prims.append(prim)
+                if prim.IsA(UsdGeom.Imageable):
+                    visibility = UsdGeom.Imageable(prim).GetVisibilityAttr().Get()
+                    if visibility == UsdGeom.Tokens.invisible:
+                        invisible_count += 1
+                        if len(invisible_prims) < INVISIBLE_PRIM_PREVIEW:
+                            invisible_prims.append(prim.GetPath())
             
             # 检查几何体详情
             print("\n🔷 几何体详细信息:")
@@ -88,66 +115,64 @@ def diagnose_usdz_content(usdz_path):
             total_vertices = 0
             total_faces = 0
             
-            for prim in stage.Traverse():
-                if prim.IsA(UsdGeom.Mesh):
-                    mesh_count += 1
-                    mesh = UsdGeom.Mesh(prim)
-                    
-                    # 获取顶点数据
-                    points_attr = mesh.GetPointsAttr()
-                    if points_attr:
+            for prim in mesh_prims:
+                mesh_count += 1
+                mesh = UsdGeom.Mesh(prim)
+                
+                # 获取顶点数据
+                points_attr = mesh.GetPointsAttr()
+                if points_attr:
+                    points = points_cache.get(prim.GetPath())
+                    if points is None:
                         points = points_attr.Get()
-                        if points:
-                            vertex_count = len(points)
-                            total_vertices += vertex_count
-                            print(f"  🔷 网格 {prim.GetPath()}: {vertex_count} 个顶点")
-                            
-                            # 检查边界框
-                            if vertex_count > 0:
-                                bbox = Gf.Range3d()
-                                for point in points:
-                                    # 转换为Vec3d类型
-                                    point_3d = Gf.Vec3d(float(point[0]), float(point[1]), float(point[2]))
-                                    bbox.UnionWith(point_3d)
-                                min_pt = bbox.GetMin()
-                                max_pt = bbox.GetMax()
-                                size = max_pt - min_pt
-                                print(f"    📏 边界框: {size[0]:.3f} x {size[1]:.3f} x {size[2]:.3f}")
-                                print(f"    📍 中心: ({(min_pt[0]+max_pt[0])/2:.3f}, {(min_pt[1]+max_pt[1])/2:.3f}, {(min_pt[2]+max_pt[2])/2:.3f})")
-                    
-                    # 获取面数据
-                    face_vertex_counts = mesh.GetFaceVertexCountsAttr().Get()
-                    if face_vertex_counts:
-                        face_count = len(face_vertex_counts)
-                        total_faces += face_count
-                        print(f"    🔺 {face_count} 个面")
-                    
-                    # 检查法线
-                    normals_attr = mesh.GetNormalsAttr()
-                    if normals_attr and normals_attr.Get():
-                        print(f"    ↗️ 有法线数据")
+                    if points:
+                        vertex_count = len(points)
+                        total_vertices += vertex_count
+                        print(f"  🔷 网格 {prim.GetPath()}: {vertex_count} 个顶点")
+                        
+                        # 检查边界框
+                        if vertex_count > 0:
+                            # 通过缓冲区协议把VtArray视为(N, 3)数组，在numpy中一次求最小/最大值
+                            point_array = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+                            min_pt = point_array.min(axis=0)
+                            max_pt = point_array.max(axis=0)
+                            size = max_pt - min_pt
+                            print(f"    📏 边界框: {size[0]:.3f} x {size[1]:.3f} x {size[2]:.3f}")
+                            print(f"    📍 中心: ({(min_pt[0]+max_pt[0])/2:.3f}, {(min_pt[1]+max_pt[1])/2:.3f}, {(min_pt[2]+max_pt[2])/2:.3f})")
+                
+                # 获取面数据
+                face_vertex_counts = mesh.GetFaceVertexCountsAttr().Get()
+                if face_vertex_counts:
+                    face_count = len(face_vertex_counts)
+                    total_faces += face_count
+                    print(f"    🔺 {face_count} 个面")
+                
+                # 检查法线
+                normals_attr = mesh.GetNormalsAttr()
+                if normals_attr and normals_attr.Get():
+                    print(f"    ↗️ 有法线数据")
+                else:
+                    print(f"    ⚠️ 缺少法线数据")
+                
+                # 检查UV坐标
+                has_uvs = False
+                try:
+                    # 检查常见的UV属性
+                    st_attr = mesh.GetPrimvar('st')
+                    if st_attr and st_attr.Get():
+                        has_uvs = True
                     else:
-                        print(f"    ⚠️ 缺少法线数据")
-                    
-                    # 检查UV坐标
-                    has_uvs = False
-                    try:
-                        # 检查常见的UV属性
-                        st_attr = mesh.GetPrimvar('st')
-                        if st_attr and st_attr.Get():
+                        # 检查其他可能的UV属性名
+                        uv_attr = mesh.GetPrimvar('uv')
+                        if uv_attr and uv_attr.Get():
                             has_uvs = True
-                        else:
-                            # 检查其他可能的UV属性名
-                            uv_attr = mesh.GetPrimvar('uv')
-                            if uv_attr and uv_attr.Get():
-                                has_uvs = True
-                    except:
-                        pass
-                    
-                    if has_uvs:
-                        print(f"    🗺️ 有UV坐标")
-                    else:
-                        print(f"    ⚠️ 缺少UV坐标")
+                except:
+                    pass
+                
+                if has_uvs:
+                    print(f"    🗺️ 有UV坐标")
+                else:
+                    print(f"    ⚠️ 缺少UV坐标")
             
             print(f"\n📊 几何体统计:")
             print(f"  🔷 总计 {mesh_count} 个网格")
@@ -157,49 +182,42 @@ def diagnose_usdz_content(usdz_path):
             # 检查材质详情
             print("\n🎨 材质详细信息:")
             material_count = 0
-            for prim in stage.Traverse():
-                if prim.IsA(UsdShade.Material):
-                    material_count += 1
-                    material = UsdShade.Material(prim)
-                    print(f"  🎨 材质 {prim.GetPath()}:")
-                    
-                    # 检查表面着色器
-                    surface_output = material.GetSurfaceOutput()
-                    if surface_output:
-                        shader_prim = surface_output.GetConnectedSource()[0]
-                        if shader_prim:
-                            shader = UsdShade.Shader(shader_prim)
-                            shader_id = shader.GetIdAttr().Get()
-                            print(f"    🔧 着色器: {shader_id}")
-                            
-                            # 检查材质属性
-                            try:
-                                inputs = shader.GetInputs()
-                                for input_attr in inputs:
-                                    input_name = input_attr.GetBaseName()
-                                    value = input_attr.Get()
-                                    if value is not None:
-                                        print(f"    🎯 {input_name}: {value}")
-                            except:
-                                # 如果无法获取输入，跳过
-                                pass
+            for prim in material_prims:
+                material_count += 1
+                material = UsdShade.Material(prim)
+                print(f"  🎨 材质 {prim.GetPath()}:")
+                
+                # 检查表面着色器
+                surface_output = material.GetSurfaceOutput()
+                if surface_output:
+                    shader_prim = surface_output.GetConnectedSource()[0]
+                    if shader_prim:
+                        shader = UsdShade.Shader(shader_prim)
+                        shader_id = shader.GetIdAttr().Get()
+                        print(f"    🔧 着色器: {shader_id}")
+                        
+                        # 检查材质属性
+                        try:
+                            inputs = shader.GetInputs()
+                            for input_attr in inputs:
+                                input_name = input_attr.GetBaseName()
+                                value = input_attr.Get()
+                                if value is not None:
+                                    print(f"    🎯 {input_name}: {value}")
+                        except:
+                            # 如果无法获取输入，跳过
+                            pass
             
             print(f"\n📊 材质统计: 总计 {material_count} 个材质")
             
             # 检查可见性
             print("\n👁️ 可见性检查:")
-            invisible_prims = []
-            for prim in stage.Traverse():
-                if prim.IsA(UsdGeom.Imageable):
-                    imageable = UsdGeom.Imageable(prim)
-                    visibility = imageable.GetVisibilityAttr().Get()
-                    if visibility == UsdGeom.Tokens.invisible:
-                        invisible_prims.append(prim.GetPath())
-            
             if invisible_prims:
-                print(f"  ⚠️ 发现 {len(invisible_prims)} 个不可见的Prim:")
+                print(f"  ⚠️ 发现 {invisible_count} 个不可见的Prim:")
                 for path in invisible_prims:
                     print(f"    👻 {path}")
+                if invisible_count > len(invisible_prims):
+                    print(f"    ... 另有 {invisible_count - len(invisible_prims)} 个未列出")
             else:
                 print(f"  ✅ 所有几何体都是可见的")
             
@@ -229,9 +247,19 @@ def diagnose_usdz_content(usdz_path):
             traceback.print_exc()
             return False
 
-def _print_prim_hierarchy(prim, indent_level):
+def _print_prim_hierarchy(prim, indent_level, points_cache=None):
+    """
+    打印Prim层次结构：先收集所有行，再一次性输出
+    
+    points_cache: 可选字典，按Prim路径记录读取到的网格顶点数组
+    """
+    lines = []
+    _collect_prim_hierarchy(prim, indent_level, points_cache, lines)
+    sys.stdout.write("\n".join(lines) + "\n")
+
+def _collect_prim_hierarchy(prim, indent_level, points_cache, lines):
     """
-    递归打印Prim层次结构
+    递归收集Prim层次结构的输出行
     """
     indent = "  " * indent_level
     prim_type = prim.GetTypeName() if prim.GetTypeName() else "Prim"
@@ -241,6 +269,8 @@ def _print_prim_hierarchy(prim, indent_level):
     if prim.IsA(UsdGeom.Mesh):
         mesh = UsdGeom.Mesh(prim)
         points = mesh.GetPointsAttr().Get()
+        if points_cache is not None and points is not None:
+            points_cache[prim.GetPath()] = points
         if points:
             geometry_info = f" ({len(points)} 顶点)"
     
@@ -252,11 +282,11 @@ def _print_prim_hierarchy(prim, indent_level):
         if visibility == UsdGeom.Tokens.invisible:
             visibility_info = " [不可见]"
     
-    print(f"{indent}📁 {prim.GetPath()} ({prim_type}){geometry_info}{visibility_info}")
+    lines.append(f"{indent}📁 {prim.GetPath()} ({prim_type}){geometry_info}{visibility_info}")
     
-    # 递归打印子Prim
+    # 递归收集子Prim
     for child in prim.GetChildren():
-        _print_prim_hierarchy(child, indent_level + 1)
+        _collect_prim_hierarchy(child, indent_level + 1, points_cache, lines)
 
 if __name__ == "__main__":
     if len(sys.argv) != 2:
@@ -15,10 +15,11 @@ import sys
 import tempfile
 import zipfile
 from pathlib import Path
+import numpy as np
 from loguru import logger
 
 try:
-    from pxr import Usd, UsdGeom, UsdShade, UsdUtils, Sdf, Gf
+    from pxr import Usd, UsdGeom, UsdShade, UsdUtils, Sdf, Gf, Vt
 except ImportError:
     logger.error("无法导入USD库，请确保已安装USD Python包")
     sys.exit(1)
@@ -583,14 +584,10 @@ class UnifiedUSDZFixer:
         if not points or len(points) == 0:
             return
         
-        # 计算边界框和中心
-        bbox = Gf.Range3d()
-        for point in points:
-            point_3d = Gf.Vec3d(float(point[0]), float(point[1]), float(point[2]))
-            bbox.UnionWith(point_3d)
-        
-        min_pt = bbox.GetMin()
-        max_pt = bbox.GetMax()
+        # 计算边界框和中心（NumPy向量化，不逐点构造Gf.Vec3d）
+        point_array = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        min_pt = point_array.min(axis=0)
+        max_pt = point_array.max(axis=0)
         center = (min_pt + max_pt) / 2.0
         size = max_pt - min_pt
         
@@ -601,17 +598,9 @@ class UnifiedUSDZFixer:
         if center_distance > max_dimension * 0.5:
             logger.info(f"    居中到原点（距离: {center_distance:.3f}）")
             
-            # 居中顶点
-            centered_points = []
-            for point in points:
-                new_point = Gf.Vec3f(
-                    float(point[0]) - center[0],
-                    float(point[1]) - center[1], 
-                    float(point[2]) - center[2]
-                )
-                centered_points.append(new_point)
-            
-            points_attr.Set(centered_points)
+            # 居中顶点（按双精度相减后转回单精度）
+            centered_points = (point_array - center).astype(np.float32)
+            points_attr.Set(Vt.Vec3fArray.FromNumpy(centered_points))
             logger.info(f"    ✓ 模型已居中")
             self.fixes_applied.append(f"居中 {mesh.GetPrim().GetName()} 到原点")
     
@@ -643,13 +632,9 @@ class UnifiedUSDZFixer:
             return
         
         # 计算边界框
-        bbox = Gf.Range3d()
-        for point in points:
-            point_3d = Gf.Vec3d(float(point[0]), float(point[1]), float(point[2]))
-            bbox.UnionWith(point_3d)
-        
-        min_pt = bbox.GetMin()
-        max_pt = bbox.GetMax()
+        point_array = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        min_pt = Gf.Vec3d(*point_array.min(axis=0).tolist())
+        max_pt = Gf.Vec3d(*point_array.max(axis=0).tolist())
         
         # 设置extent
         extent_attr = mesh.GetExtentAttr()
@@ -6,7 +6,11 @@
 
 import os
 import sys
+import json
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from functools import lru_cache
 from pathlib import Path
 from datetime import datetime
 from typing import Dict, Any
@@ -36,6 +40,9 @@ VERSION_HISTORY = [
     }
 ]
 
+# PyPI版本查询的本地缓存（ETag和版本号），包信息未变化时服务器返回304而不重传JSON
+PYPI_CACHE_DIR = Path.home() / ".cache" / "crystal3d" / "pypi"
+
 def get_app_info() -> Dict[str, Any]:
     """获取软件基本信息"""
     return {
@@ -87,13 +94,58 @@ def get_package_version(package_name: str) -> str:
         except (pkg_resources.DistributionNotFound, ImportError):
             return "未安装"
 
+@lru_cache(maxsize=1)
+def get_http_session() -> requests.Session:
+    """
+    获取共用的HTTP会话
+    版本检查会连续请求PyPI多次，复用连接可省去每次的DNS解析和TCP/TLS握手；
+    只对服务端5xx做有限重试，连接失败不重试，以免离线时成倍延长等待
+    """
+    session = requests.Session()
+    retry = Retry(total=2, connect=0, backoff_factor=0.1, status_forcelist=(500, 502, 503, 504))
+    session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=retry))
+    return session
+
+def _load_pypi_cache(cache_file: Path) -> Dict[str, str]:
+    """读取PyPI版本缓存，不存在或损坏时返回空字典"""
+    try:
+        with open(cache_file, 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return cached if isinstance(cached, dict) else {}
+
+def _save_pypi_cache(cache_file: Path, etag: str, version: str):
+    """保存PyPI版本缓存，写入失败不影响版本检查"""
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(cache_file, 'w', encoding='utf-8') as f:
+            json.dump({'etag': etag, 'version': version}, f)
+    except OSError as e:
+        logger.debug(f"保存PyPI版本缓存失败: {e}")
+
 def check_pypi_latest_version(package_name: str, timeout: int = 5) -> str:
-    """从PyPI检查包的最新版本"""
+    """
+    从PyPI检查包的最新版本
+    带上次响应的ETag发送条件请求，未变化时直接使用缓存的版本号，
+    避免重复下载完整的包信息JSON（pymatgen等包有数MB）
+    """
+    cache_file = PYPI_CACHE_DIR / f"{package_name}.json"
+    cached = _load_pypi_cache(cache_file)
+    headers = {'If-None-Match': cached['etag']} if cached.get('etag') and cached.get('version') else {}
+    
     try:
-        response = requests.get(f"https://pypi.org/pypi/{package_name}/json", timeout=timeout)
+        response = get_http_session().get(f"https://pypi.org/pypi/{package_name}/json",
+                                          headers=headers, timeout=timeout)
+        if response.status_code == 304 and headers:
+            return cached['version']
         if response.status_code == 200:
             data = response.json()
-            return data['info']['version']
+            version = data['info']['version']
+            etag = response.headers.get('ETag')
+            if etag:
+                _save_pypi_cache(cache_file, etag, version)
+            return version
     except Exception as e:
         logger.debug(f"检查{package_name}最新版本失败: {e}")
     return None
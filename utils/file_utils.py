@@ -2,11 +2,22 @@
 文件处理工具函数
 """
 import os
+import re
 import tempfile
 import shutil
 import uuid
+from functools import lru_cache, wraps
 from pathlib import Path
-from typing import List
+from typing import List, Optional
+
+# CIF文件特征标记（模块级常量，避免每次调用重建列表）
+CIF_MARKERS = ('data_', '_cell_length_a', '_atom_site_', 'loop_')
+
+# OBJ材质引用行（按字节匹配）
+OBJ_USEMTL_PATTERN = re.compile(rb'^usemtl [ \t]*(\S+)', re.MULTILINE)
+
+# 内存文件系统，转换中间文件放在这里可避免落盘再读取
+SHM_DIR = '/dev/shm'
 
 
 def ensure_dir(path: str) -> str:
@@ -24,6 +35,45 @@ def get_temp_filename(suffix: str = '') -> str:
     return os.path.join(temp_dir, filename)
 
 
+def cached_by_stat(maxsize: int = 32):
+    """
+    按(绝对路径, 修改时间, 文件大小)缓存单个文件的解析结果，文件变化后自动失效
+    
+    被装饰函数的第一个参数为文件路径，其余参数一并作为缓存键；
+    文件不存在时os.stat抛出OSError，解析抛出的异常同样不会被缓存
+    """
+    def decorator(func):
+        @lru_cache(maxsize=maxsize)
+        def cached(path, mtime_ns, size, *args, **kwargs):
+            return func(path, *args, **kwargs)
+        
+        @wraps(func)
+        def wrapper(path, *args, **kwargs):
+            stat = os.stat(path)
+            return cached(os.path.abspath(path), stat.st_mtime_ns, stat.st_size, *args, **kwargs)
+        
+        wrapper.cache_info = cached.cache_info
+        wrapper.cache_clear = cached.cache_clear
+        return wrapper
+    return decorator
+
+
+def get_shm_dir(min_free_space: int) -> Optional[str]:
+    """
+    内存文件系统可写且剩余空间不少于min_free_space字节时返回其路径，
+    否则返回None，由调用方使用系统默认临时目录
+    """
+    if not os.path.isdir(SHM_DIR) or not os.access(SHM_DIR, os.W_OK):
+        return None
+    try:
+        stat = os.statvfs(SHM_DIR)
+    except (OSError, AttributeError):  # Windows没有statvfs
+        return None
+    if stat.f_bavail * stat.f_frsize < min_free_space:
+        return None
+    return SHM_DIR
+
+
 def cleanup_temp_files(file_paths: List[str]) -> None:
     """清理临时文件"""
     for file_path in file_paths:
@@ -36,25 +86,22 @@ def cleanup_temp_files(file_paths: List[str]) -> None:
 
 def is_valid_cif_file(file_path: str) -> bool:
     """检查是否为有效的CIF文件"""
-    if not os.path.exists(file_path):
-        return False
-    
+    # 文件不存在时open会抛出FileNotFoundError，无需预先检查
     try:
         with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read(1000)  # 读取前1000字符
+            content = f.read(1000).lower()  # 读取前1000字符
             # 简单检查CIF文件标识
-            return any(keyword in content.lower() for keyword in [
-                'data_', '_cell_length_a', '_atom_site_', 'loop_'
-            ])
+            return any(keyword in content for keyword in CIF_MARKERS)
     except Exception:
         return False
 
 
 def get_file_size_mb(file_path: str) -> float:
     """获取文件大小（MB）"""
-    if not os.path.exists(file_path):
+    try:
+        return os.stat(file_path).st_size / (1024 * 1024)
+    except OSError:
         return 0.0
-    return os.path.getsize(file_path) / (1024 * 1024)
 
 
 def analyze_obj_file(obj_path: str) -> dict:
@@ -63,20 +110,21 @@ def analyze_obj_file(obj_path: str) -> dict:
         return {'error': 'File not found'}
     
     try:
-        with open(obj_path, 'r', encoding='utf-8') as f:
+        # 直接在bytes上统计，不解码整个文件，也不为每行创建字符串
+        with open(obj_path, 'rb') as f:
             content = f.read()
         
         # 统计基本元素
-        vertices = content.count('\nv ')
-        faces = content.count('\nf ')
-        materials = len(set(line.split()[1] for line in content.split('\n') if line.startswith('usemtl ')))
+        vertices = content.count(b'\nv ')
+        faces = content.count(b'\nf ')
+        materials = len(set(OBJ_USEMTL_PATTERN.findall(content)))
         
         return {
             'vertices': vertices,
             'faces': faces,
             'materials': materials,
-            'file_size': os.path.getsize(obj_path),
-            'lines': len(content.split('\n'))
+            'file_size': len(content),
+            'lines': content.count(b'\n') + 1
         }
     except Exception as e:
         return {'error': str(e)}
\ No newline at end of file
@@ -140,6 +140,7 @@ class OutputManager:
         # 复制文件
         if os.path.exists(file_path):
             shutil.copy2(file_path, target_path)
+            size_bytes = target_path.stat().st_size
             
             # 更新会话元数据
             self._update_session_metadata(session_id, {
@@ -147,8 +148,8 @@ class OutputManager:
                     file_type: {
                         "filename": target_name,
                         "path": str(target_path),
-                        "size_bytes": os.path.getsize(target_path),
-                        "size_mb": round(os.path.getsize(target_path) / (1024 * 1024), 3),
+                        "size_bytes": size_bytes,
+                        "size_mb": round(size_bytes / (1024 * 1024), 3),
                         "description": description,
                         "saved_at": datetime.now().isoformat()
                     }
@@ -6,10 +6,11 @@
 """
 
 import sys
-import requests
 from pathlib import Path
 from loguru import logger
 
+from .app_version import get_http_session
+
 class VersionInfo:
     def __init__(self, name, current_version=None, latest_version=None, available=False, update_available=False):
         self.name = name
@@ -47,7 +48,7 @@ class ComponentVersionChecker:
             update_available = False
             
             try:
-                response = requests.get("https://pypi.org/pypi/usd-core/json", timeout=5)
+                response = get_http_session().get("https://pypi.org/pypi/usd-core/json", timeout=5)
                 if response.status_code == 200:
                     data = response.json()
                     latest_version = data['info']['version']
@@ -183,7 +184,7 @@ class ComponentVersionChecker:
             update_available = False
             
             try:
-                response = requests.get("https://pypi.org/pypi/pymatgen/json", timeout=5)
+                response = get_http_session().get("https://pypi.org/pypi/pymatgen/json", timeout=5)
                 if response.status_code == 200:
                     data = response.json()
                     latest_version = data['info']['version']
@@ -225,7 +226,7 @@ class ComponentVersionChecker:
             update_available = False
             
             try:
-                response = requests.get("https://pypi.org/pypi/ase/json", timeout=5)
+                response = get_http_session().get("https://pypi.org/pypi/ase/json", timeout=5)
                 if response.status_code == 200:
                     data = response.json()
                     latest_version = data['info']['version']
@@ -267,7 +268,7 @@ class ComponentVersionChecker:
             update_available = False
             
             try:
-                response = requests.get("https://pypi.org/pypi/fastapi/json", timeout=5)
+                response = get_http_session().get("https://pypi.org/pypi/fastapi/json", timeout=5)
                 if response.status_code == 200:
                     data = response.json()
                     latest_version = data['info']['version']